@@ -1,7 +1,15 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from backend.api.monday import df_sales
+from backend.api.monday import get_df_sales
+from backend.api.payments import fetch_daily_totals, PAYMENTS_CACHE_TTL
+from backend.cache import shared_cache
+from backend.analytics.cube import get_finance_cube
+from backend.analytics.periods import comparison_span, selectable_years
+from backend.analytics.sales import get_sales_index
+from backend.period_selector import select_comparison, select_period
+from backend.charts import pie_chart_png
+from backend import metrics
+from backend.metrics_panel import render_metrics_sidebar
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import os
@@ -9,7 +17,7 @@ import os
 # Load environment variables
 load_dotenv()
 SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
-SUPABASE_BASE_URL = "https://bnwuaviahfwgqpakswwj.supabase.co"
+SUPABASE_BASE_URL = os.getenv("SUPABASE_URL", "https://bnwuaviahfwgqpakswwj.supabase.co")
 TABLE_NAME = "payments"
 
 # Set pandas option globally to suppress warnings
@@ -46,92 +54,70 @@ def main():
     st.title("📊 **Finance Dashboard**")
     st.markdown("### Compare Revenue and Costs with Detailed Insights")
 
-    # Year and Month selection
-    months = ["Whole Year", "January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-    years = [2024, 2025]
-
-    col1, col2 = st.columns(2)
-    with col1:
-        year_selected = st.radio("📅 Select the Year", years)
-    with col2:
-        month_selected = st.selectbox("📅 Select the Month", months)
-
     with st.sidebar:
         st.image("https://www.ustayinusa.com/logo.svg")
         st.markdown("### **Finance Summary**")
         st.write("Explore your finances with detailed comparisons between revenue and costs.")
 
-    # Ensure "Pmt Date" is in datetime format
-    df_sales["Pmt Date"] = pd.to_datetime(df_sales["Pmt Date"], format="%Y-%m-%d", errors="coerce")
-
-    # Filter DataFrame based on selected year and month
-    if month_selected == "Whole Year":
-        filtered_df = df_sales[df_sales["Pmt Date"].dt.year == year_selected]
-        previous_period_df = df_sales[df_sales["Pmt Date"].dt.year == year_selected - 1]
-    else:
-        month_index = months.index(month_selected)
-        filtered_df = df_sales[
-            (df_sales["Pmt Date"].dt.year == year_selected) & (df_sales["Pmt Date"].dt.month == month_index)
-        ]
-        previous_period_df = df_sales[
-            (df_sales["Pmt Date"].dt.year == (year_selected if month_index > 1 else year_selected - 1)) &
-            (df_sales["Pmt Date"].dt.month == (month_index - 1 if month_index > 1 else 12))
-        ]
+    # "Pmt Date" and "Total Amount" arrive already typed from the board schema
+    try:
+        df_sales = get_df_sales()
+    except ValueError as e:
+        st.error(f"❌ Could not load sales data from Monday: {e}")
+        st.stop()
+
     import datetime
     today = pd.Timestamp(datetime.date.today())
-    filtered_df = filtered_df[filtered_df["Pmt Date"] <= today]
-    previous_period_df = previous_period_df[previous_period_df["Pmt Date"] <= today]
 
-    # Convert "Total Amount" to numeric
-    filtered_df.loc[:, "Total Amount"] = pd.to_numeric(filtered_df["Total Amount"], errors="coerce")
-    previous_period_df.loc[:, "Total Amount"] = pd.to_numeric(previous_period_df["Total Amount"], errors="coerce")
+    # Years come from the sales data; the selection and the period it is compared with
+    years = selectable_years(get_sales_index(df_sales).dates)
+    period = select_period(years)
+    comparison = select_comparison(period)
+    start_date, end_date = period.bounds()
 
-    # Fetch costs data from Supabase
+    # Aggregates are built once per sales refresh, every selection is a lookup
     with st.spinner("Fetching cost data..."):
-        if month_selected == "Whole Year":
-            start_date, end_date = f"{year_selected}-01-01", f"{year_selected + 1}-01-01"
-            prev_start_date, prev_end_date = f"{year_selected - 1}-01-01", f"{year_selected}-01-01"
-        else:
-            start_date = f"{year_selected}-{month_index:02d}-01"
-            end_date = f"{year_selected}-{month_index + 1:02d}-01" if month_index < 12 else f"{year_selected + 1}-01-01"
-            prev_start_date = f"{year_selected}-{month_index - 1:02d}-01" if month_index > 1 else f"{year_selected - 1}-12-01"
-            prev_end_date = start_date
-
-        response = supabase.table(TABLE_NAME).select("*") \
-            .filter("payment_date", "gte", start_date) \
-            .filter("payment_date", "lt", end_date) \
-            .execute()
-        prev_response = supabase.table(TABLE_NAME).select("*") \
-            .filter("payment_date", "gte", prev_start_date) \
-            .filter("payment_date", "lt", prev_end_date) \
-            .execute()
-
-    # Prepare cost DataFrame
-    df = pd.DataFrame(response.data or [])
-    prev_df = pd.DataFrame(prev_response.data or [])
+        # Costs arrive pre-grouped per day and category from the database, for
+        # every date a selection or the period it is compared with can cover
+        cost_start, cost_end = comparison_span(years).bounds()
+        cube = get_finance_cube(
+            df_sales,
+            lambda: shared_cache.get_or_load(
+                ("payments", "daily_totals", cost_start, cost_end),
+                lambda: fetch_daily_totals(supabase, TABLE_NAME, cost_start, cost_end),
+                ttl=PAYMENTS_CACHE_TTL,
+            ),
+        )
+    # Period lookups are shared by every session looking at the same selection
+    current = shared_cache.get_or_load(
+        ("payments", "finance_period", cube.token, cube.version, start_date, end_date, today),
+        lambda: cube.period(start_date, end_date, until=today),
+    )
+    previous = cube.compare([comparison], until=today).iloc[0]
 
     # Metrics Calculation
-    revenue = filtered_df["Total Amount"].sum() if not filtered_df.empty else 0
-    cost = df["payment_value"].sum() if not df.empty else 0
+    revenue = current["revenue"]
+    cost = current["cost"]
     profit = revenue - cost
 
-    previous_revenue = previous_period_df["Total Amount"].sum() if not previous_period_df.empty else 0
-    previous_cost = prev_df["payment_value"].sum() if not prev_df.empty else 0
+    previous_revenue = previous["revenue"]
+    previous_cost = previous["cost"]
 
     # Calculate deltas
     revenue_delta = f"{((revenue - previous_revenue) / previous_revenue * 100):.2f}%" if previous_revenue > 0 else "N/A"
     cost_delta = f"{((cost - previous_cost) / previous_cost * 100):.2f}%" if previous_cost > 0 else "N/A"
     profit_margin = (profit / revenue * 100) if revenue > 0 else 0
 
-    # Handle duplicates in time_series and time_series_cost
-    time_series = filtered_df.set_index("Pmt Date")["Total Amount"].groupby("Pmt Date").sum()
-    time_series_cost = df.groupby("payment_date")["payment_value"].sum()
+    time_series = current["revenue_series"]
+    time_series_cost = current["cost_series"]
+    cost_distribution = current["cost_by_category"]
 
     # Combine data with explicit infer_objects()
     combined = pd.concat([time_series.rename("Revenue"), time_series_cost.rename("Costs")], axis=1).fillna(0).infer_objects()
 
     # Display Metrics
     st.markdown("## **Key Metrics**")
+    st.caption(f"{period.label}, compared with {comparison.label}")
     col3, col4, col5 = st.columns(3)
     col3.metric("💵 Revenue", f"${revenue:,.2f}", revenue_delta)
     col4.metric("📉 Costs", f"${cost:,.2f}", cost_delta)
@@ -146,48 +132,40 @@ def main():
     # Visualizations
     st.markdown("## **Visual Analytics**")
     col8, col9 = st.columns(2)
-    with col8:
+    with col8, metrics.span("render", chart="revenue_vs_costs"):
         st.markdown("### Revenue vs. Costs Over Time")
         st.line_chart(combined)
 
-    with col9:
+    with col9, metrics.span("render", chart="cost_by_category"):
         st.markdown("### Cost Distribution by Category")
-        cost_distribution = df.groupby("payment_category")["payment_value"].sum()
         st.bar_chart(cost_distribution)
     
+    # Pie charts are rendered once per distinct data and reused across reruns
+    labels = cost_distribution.index
+    cost_distribution_over_revenue = list(cost_distribution.values / revenue) if revenue > 0 else []
+
     col10, col11 = st.columns(2)
-    with col10:
+    with col10, metrics.span("render", chart="cost_pie"):
         st.markdown("### Cost Distribution Pie Chart")
-        labels = cost_distribution.index 
-        sizes = cost_distribution.values 
-
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%')
-        ax.axis('equal')  
-        st.pyplot(fig)
-    
-    with col11:
-        st.markdown("### Cost Distribution by Category")
-        cost_distribution = df.groupby("payment_category")["payment_value"].sum()
-        st.bar_chart(cost_distribution)
+        if not cost_distribution.empty:
+            st.image(pie_chart_png(labels, cost_distribution.values))
+        else:
+            st.info("No costs in this period.")
 
-    
-    col12, col13 = st.columns(2)
-    with col12:
+    with col11, metrics.span("render", chart="cost_over_revenue_pie"):
         st.markdown("### Cost Distribution over Revenue")
-        cost_distribution_over_revenue = [x/revenue for x in cost_distribution]
-
-        fig1, ax1 = plt.subplots()
-        ax1.pie(cost_distribution_over_revenue, labels=labels, autopct='%1.1f%%')
-        ax1.axis("equal")
-        st.pyplot(fig1)
-
+        if cost_distribution_over_revenue:
+            st.image(pie_chart_png(labels, cost_distribution_over_revenue))
+        else:
+            st.info("No revenue in this period.")
 
     st.write(cost_distribution_over_revenue)
 
 
     st.markdown("---")
 
+    render_metrics_sidebar({"df_sales": df_sales})
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
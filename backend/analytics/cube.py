@@ -0,0 +1,154 @@
+import itertools
+import threading
+import time
+import pandas as pd
+from backend import metrics
+from backend.cache import shared_cache
+from backend.analytics.sales import get_sales_index
+from backend.analytics.periods import PeriodSeries
+
+DAY = pd.Timedelta(days=1)
+
+_tokens = itertools.count()
+
+def _group_daily(dates, keys, values):
+    # Sum of values per day (rows) and key (columns), on a sorted DatetimeIndex
+    if len(dates) == 0:
+        return pd.DataFrame(index=pd.DatetimeIndex([]), dtype="float64")
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+    daily = pd.Series(values).groupby([pd.DatetimeIndex(dates).normalize(), pd.Index(keys).astype(str)]).sum()
+    daily = daily.unstack(fill_value=0.0)
+    daily.columns.name = None
+    return daily.sort_index().astype("float64")
+
+def _daily(df, date_column, key_column, value_column):
+    return _group_daily(pd.to_datetime(df[date_column]), df[key_column], df[value_column])
+
+def _totals(revenue_daily, cost_daily):
+    # Daily revenue and cost totals on one gap-free index
+    daily = pd.concat([revenue_daily.sum(axis=1).rename("revenue"), cost_daily.sum(axis=1).rename("cost")], axis=1)
+    return PeriodSeries(daily.fillna(0.0))
+
+# Revenue per board and costs per payment_category, aggregated by day, plus the
+# daily revenue and cost totals as a PeriodSeries. It is built once per data
+# refresh; period totals are cumulative-sum lookups and chart series are slices
+# of the sorted date index instead of filters over the raw rows.
+class FinanceCube:
+    def __init__(self, df_sales, payments):
+        # Distinguishes this cube from earlier ones in cache keys; version counts
+        # the payments folded in since it was built
+        self.token = next(_tokens)
+        self.version = 0
+        # time.monotonic() once its payments were loaded, set by get_finance_cube
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        # Grouped straight off the date-sorted index, without copying the rows
+        sales = get_sales_index(df_sales).between()
+        self.revenue_daily = _group_daily(sales.index, sales["board"], sales["Total Amount"])
+        self.cost_daily = _daily(payments, "payment_date", "payment_category", "payment_value")
+        self.series = _totals(self.revenue_daily, self.cost_daily)
+
+    # Fold newly inserted payments into the cost aggregates
+    def add_payments(self, payments):
+        daily = _daily(pd.DataFrame(payments), "payment_date", "payment_category", "payment_value")
+        if daily.empty:
+            return
+        with self._lock:
+            self.cost_daily = self.cost_daily.add(daily, fill_value=0.0).sort_index()
+            self.series = _totals(self.revenue_daily, self.cost_daily)
+            self.version += 1
+
+    # Metrics for start <= date < end. Revenue after `until` (inclusive) is left out,
+    # as the dashboard does not count sales dated in the future.
+    def period(self, start, end, until=None):
+        with metrics.span("transform", step="cube_period"):
+            return self._period(start, end, until)
+
+    def _period(self, start, end, until):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        revenue_end = min(end, pd.Timestamp(until) + DAY) if until is not None else end
+        with self._lock:
+            revenue_daily, cost_daily, series = self.revenue_daily, self.cost_daily, self.series
+
+        totals = series.totals([start, start], [max(start, revenue_end), end])
+        cost_slice = cost_daily.loc[start:end - DAY]
+        cost_by_category = cost_slice.sum()
+        return {
+            "revenue": float(totals["revenue"].iloc[0]),
+            "cost": float(totals["cost"].iloc[1]),
+            "revenue_series": revenue_daily.loc[start:revenue_end - DAY].sum(axis=1),
+            "cost_series": cost_slice.sum(axis=1),
+            "cost_by_category": cost_by_category[cost_by_category != 0],
+        }
+
+    # Revenue and cost totals of several periods at once, one row per period.
+    # Revenue after `until` is left out as in period().
+    def compare(self, periods, until=None):
+        periods = list(periods)
+        with self._lock:
+            series = self.series
+        totals = series.compare(periods)
+        if until is not None:
+            cutoff = pd.Timestamp(until) + DAY
+            capped = series.totals(
+                [p.start for p in periods],
+                [max(p.start, min(p.end, cutoff)) for p in periods],
+            )
+            totals["revenue"] = capped["revenue"].to_numpy()
+        return totals
+
+_cube = None
+_cube_sales = None
+_cube_lock = threading.Lock()
+# Held while a cube is built, so sessions wait for one build instead of each
+# running their own; record_payments never waits for it
+_build_lock = threading.Lock()
+# Counts recorded inserts; a build that overlapped one loads its payments again
+_inserts = 0
+BUILD_ATTEMPTS = 3
+
+def _current(df_sales):
+    with _cube_lock:
+        return _cube if _cube is not None and _cube_sales is df_sales else None
+
+# Return the cube for this sales snapshot, building it when the snapshot changes.
+# `load_payments` is only called on a rebuild, outside _cube_lock.
+def get_finance_cube(df_sales, load_payments):
+    global _cube, _cube_sales
+    cube = _current(df_sales)
+    if cube is not None:
+        return cube
+    with _build_lock:
+        for attempt in range(BUILD_ATTEMPTS):
+            cube = _current(df_sales)
+            if cube is not None:
+                return cube
+            with _cube_lock:
+                inserts = _inserts
+            payments = load_payments()
+            loaded_at = time.monotonic()
+            with metrics.span("transform", step="cube_build"):
+                cube = FinanceCube(df_sales, payments)
+            cube.loaded_at = loaded_at
+            with _cube_lock:
+                # Payments recorded during the load may or may not be in it
+                if _inserts == inserts or attempt == BUILD_ATTEMPTS - 1:
+                    _cube, _cube_sales = cube, df_sales
+                    return cube
+
+# Apply newly inserted payment rows to the current cube and drop the cached
+# results derived from payments. `sent_at` is the time.monotonic() taken before
+# the insert was sent: a cube whose payments were loaded earlier cannot hold the
+# rows and gets them added, any other cube is dropped and rebuilt on next use.
+def record_payments(rows, sent_at):
+    global _cube, _inserts
+    with _cube_lock:
+        if _cube is not None and rows:
+            if _cube.loaded_at <= sent_at:
+                _cube.add_payments(rows)
+            else:
+                _cube = None
+    # The cube is updated first, so results cached after the invalidation include the new rows
+    shared_cache.invalidate("payments")
+    with _cube_lock:
+        _inserts += 1
@@ -0,0 +1,130 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+DAY = pd.Timedelta(days=1)
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+# Kinds of period; calendar kinds step back by whole calendar units, ranges by their length
+YEAR = "year"
+QUARTER = "quarter"
+MONTH = "month"
+RANGE = "range"
+
+_steps = {
+    YEAR: pd.DateOffset(years=1),
+    QUARTER: pd.DateOffset(months=3),
+    MONTH: pd.DateOffset(months=1),
+}
+
+# Dates with start <= date < end
+class Period:
+    def __init__(self, start, end, label, kind=RANGE):
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize()
+        if self.end < self.start:
+            raise ValueError(f"Period ends before it starts: {start} - {end}")
+        self.label = label
+        self.kind = kind
+
+    def __repr__(self):
+        return f"Period({self.start.date()}, {self.end.date()}, {self.label!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Period) and (self.start, self.end) == (other.start, other.end)
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    @property
+    def days(self):
+        return (self.end - self.start).days
+
+    # Start and end as ISO date strings, as used in database filters and cache keys
+    def bounds(self):
+        return self.start.strftime("%Y-%m-%d"), self.end.strftime("%Y-%m-%d")
+
+    # Move the period back by `offset`. Calendar periods move both bounds, so a
+    # month stays a whole month; ranges keep their length in days.
+    def shift(self, offset, label):
+        start = self.start - offset
+        end = start + pd.Timedelta(days=self.days) if self.kind == RANGE else self.end - offset
+        return Period(start, end, label, self.kind)
+
+    # The period right before this one: the previous month, quarter or year, or
+    # the range of the same length that ends where this one starts
+    def previous(self):
+        step = _steps.get(self.kind, pd.Timedelta(days=self.days))
+        return self.shift(step, f"before {self.label}")
+
+    # The same dates one year earlier
+    def year_over_year(self):
+        return self.shift(pd.DateOffset(years=1), f"{self.label} last year")
+
+def year_period(year):
+    return Period(f"{year}-01-01", f"{year + 1}-01-01", str(year), YEAR)
+
+def quarter_period(year, quarter):
+    start = pd.Timestamp(year=year, month=3 * (quarter - 1) + 1, day=1)
+    return Period(start, start + _steps[QUARTER], f"Q{quarter} {year}", QUARTER)
+
+def month_period(year, month):
+    start = pd.Timestamp(year=year, month=month, day=1)
+    return Period(start, start + _steps[MONTH], f"{MONTHS[month - 1]} {year}", MONTH)
+
+# The last `days` days up to and including `until`
+def trailing_period(days, until=None):
+    end = pd.Timestamp(until or datetime.date.today()).normalize() + DAY
+    return Period(end - pd.Timedelta(days=days), end, f"last {days} days")
+
+# Both dates included, as picked in a date range input
+def range_period(first, last):
+    first, last = pd.Timestamp(first), pd.Timestamp(last)
+    return Period(first, last + DAY, f"{first.date()} to {last.date()}")
+
+# Years offered by the period selectors: those covered by `dates`, or every year
+# since `first_year`, up to the current one
+def selectable_years(dates=None, first_year=2024):
+    this_year = datetime.date.today().year
+    if dates is not None and len(dates):
+        dates = pd.DatetimeIndex(dates)
+        first_year = min(dates.min().year, this_year)
+        this_year = max(dates.max().year, this_year)
+    return list(range(first_year, this_year + 1))
+
+# Every date a selection within `years` and the period it is compared with can
+# cover. A selection is at most as long as those years, and its comparison lies
+# at most that far, or one year, before it.
+def comparison_span(years):
+    selectable = Period(f"{min(years)}-01-01", f"{max(years) + 1}-01-01", "selectable years")
+    start = min(selectable.start - pd.Timedelta(days=selectable.days), selectable.start - _steps[YEAR])
+    return Period(start, selectable.end, "comparison span")
+
+# Daily values (one column per measure) on a gap-free date index. Totals for any
+# number of periods are differences of cumulative sums at binary-searched
+# positions, so comparing more periods never rescans the days in between.
+class PeriodSeries:
+    def __init__(self, daily):
+        daily = daily.sort_index()
+        if len(daily):
+            daily = daily.asfreq("D", fill_value=0.0)
+        self.daily = daily.astype("float64")
+        self._dates = self.daily.index
+        values = self.daily.to_numpy()
+        self._cumsum = np.vstack([np.zeros((1, values.shape[1])), values.cumsum(axis=0)])
+
+    # One row of totals per (start, end) pair, dates with start <= date < end
+    def totals(self, starts, ends):
+        i = self._dates.searchsorted(pd.DatetimeIndex(starts), side="left")
+        j = self._dates.searchsorted(pd.DatetimeIndex(ends), side="left")
+        totals = self._cumsum[np.maximum(i, j)] - self._cumsum[i]
+        return pd.DataFrame(totals, columns=self.daily.columns)
+
+    # Totals of each period, one row per period labelled by it
+    def compare(self, periods):
+        periods = list(periods)
+        totals = self.totals([p.start for p in periods], [p.end for p in periods])
+        totals.index = [p.label for p in periods]
+        return totals
@@ -0,0 +1,103 @@
+import argparse
+import datetime
+import os
+import pandas as pd
+from backend.analytics.cube import FinanceCube
+
+# Finance metrics for every month and every year in one pass over the cube's
+# aggregates, the same figures the Finance dashboard shows one selection at a time.
+#
+#   python -m backend.analytics.report --output report.csv
+#   python -m backend.analytics.report --output report.parquet --start 2024-01-01
+
+REPORT_COLUMNS = [
+    "period_type", "period", "revenue", "cost", "profit", "profit_margin", "cost_margin",
+    "previous_revenue", "previous_cost", "revenue_delta", "cost_delta",
+]
+
+def _metrics(revenue, cost, period_type):
+    frame = pd.DataFrame({"revenue": revenue, "cost": cost}).fillna(0.0)
+    frame["profit"] = frame["revenue"] - frame["cost"]
+    has_revenue = frame["revenue"] > 0
+    frame["profit_margin"] = (frame["profit"] / frame["revenue"] * 100).where(has_revenue, 0.0)
+    frame["cost_margin"] = (frame["cost"] / frame["revenue"] * 100).where(has_revenue, 0.0)
+    # Previous period is the row before, the index has no gaps
+    frame["previous_revenue"] = frame["revenue"].shift(1, fill_value=0.0)
+    frame["previous_cost"] = frame["cost"].shift(1, fill_value=0.0)
+    # Deltas are undefined (NaN) where the dashboard shows "N/A"
+    frame["revenue_delta"] = ((frame["revenue"] - frame["previous_revenue"]) / frame["previous_revenue"] * 100) \
+        .where(frame["previous_revenue"] > 0)
+    frame["cost_delta"] = ((frame["cost"] - frame["previous_cost"]) / frame["previous_cost"] * 100) \
+        .where(frame["previous_cost"] > 0)
+    frame.index.name = "period"
+    return frame.reset_index().assign(period_type=period_type)
+
+def _between(daily, start, end):
+    keep = pd.Series(True, index=daily.index)
+    if start is not None:
+        keep &= daily.index >= pd.Timestamp(start)
+    if end is not None:
+        keep &= daily.index < pd.Timestamp(end)
+    return daily[keep]
+
+# One row per month and per year covered by the data with start <= date < end.
+# Revenue dated after `until` is left out, like on the dashboard.
+def build_report(df_sales, payments, start=None, end=None, until=None):
+    cube = FinanceCube(df_sales, payments)
+    revenue_daily = _between(cube.series.daily["revenue"], start, end)
+    if until is not None:
+        revenue_daily = revenue_daily.loc[:pd.Timestamp(until)]
+    cost_daily = _between(cube.series.daily["cost"], start, end)
+
+    dates = revenue_daily.index.union(cost_daily.index)
+    if dates.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    months = pd.date_range(dates.min().to_period("M").to_timestamp(), dates.max(), freq="MS")
+
+    revenue_monthly = revenue_daily.resample("MS").sum().reindex(months, fill_value=0.0)
+    cost_monthly = cost_daily.resample("MS").sum().reindex(months, fill_value=0.0)
+    monthly = _metrics(revenue_monthly, cost_monthly, "month")
+    yearly = _metrics(revenue_monthly.resample("YS").sum(), cost_monthly.resample("YS").sum(), "year")
+    return pd.concat([yearly, monthly], ignore_index=True)[REPORT_COLUMNS]
+
+def write_report(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith(".parquet"):
+        report.to_parquet(path, index=False)
+    else:
+        report.to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute finance metrics for every month and year")
+    parser.add_argument("--output", default="finance_report.csv", help="CSV or .parquet file to write")
+    parser.add_argument("--start", default="2000-01-01", help="first date to include")
+    parser.add_argument("--end", help="dates before this are included (default: start of next year)")
+    args = parser.parse_args()
+
+    # Imported here so build_report can be used without credentials or network access
+    from dotenv import load_dotenv
+    from supabase import create_client
+    from backend.api.monday import sales_boards, sales_columns
+    from backend.api.payments import fetch_daily_totals
+    from backend.sync.monday import sync_boards
+
+    load_dotenv()
+    client = create_client(
+        os.getenv("SUPABASE_URL", "https://bnwuaviahfwgqpakswwj.supabase.co"),
+        os.getenv("SUPABASE_API_KEY"),
+    )
+    today = datetime.date.today()
+    end = args.end or f"{today.year + 1}-01-01"
+
+    # Synced here rather than read through get_df_sales, which may hand back the
+    # last local snapshot while it refreshes in the background
+    df_sales = sync_boards(sales_boards, columns=sales_columns)
+    payments = fetch_daily_totals(client, "payments", args.start, end)
+    report = build_report(df_sales, payments, start=args.start, end=end, until=today)
+    write_report(report, args.output)
+    print(f"Wrote {len(report)} periods to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import threading
+import pandas as pd
+from backend import metrics
+
+DATE_COLUMN = "Pmt Date"
+
+# Sales rows without a payment date are dropped, the rest are sorted by date and
+# indexed by it. Period lookups binary-search the index and return slices of the
+# prepared frame, so callers must treat them as read-only.
+class SalesIndex:
+    def __init__(self, df_sales):
+        frame = df_sales.dropna(subset=[DATE_COLUMN]).sort_values(DATE_COLUMN, kind="stable")
+        self._frame = frame.set_index(DATE_COLUMN)
+        self._dates = self._frame.index
+
+    def __len__(self):
+        return len(self._frame)
+
+    @property
+    def frame(self):
+        return self._frame
+
+    # Rows with start <= date < end; either bound may be None
+    def between(self, start=None, end=None):
+        i = 0 if start is None else self._dates.searchsorted(pd.Timestamp(start), side="left")
+        j = len(self._dates) if end is None else self._dates.searchsorted(pd.Timestamp(end), side="left")
+        return self._frame.iloc[i:max(i, j)]
+
+    @property
+    def dates(self):
+        return self._dates
+
+_index = None
+_index_sales = None
+_index_lock = threading.Lock()
+
+# Return the prepared index for this sales snapshot, building it once per snapshot
+def get_sales_index(df_sales):
+    global _index, _index_sales
+    with _index_lock:
+        if _index is None or _index_sales is not df_sales:
+            with metrics.span("transform", step="sales_index"):
+                _index = SalesIndex(df_sales)
+            _index_sales = df_sales
+        return _index
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_string_dtype
+
+# Dtype kinds used in board schemas
+DATETIME = "datetime"
+FLOAT = "float"
+INTEGER = "integer"
+CATEGORY = "category"
+TEXT = "text"
+
+# Default kind for each Monday column type; anything else is kept as text
+column_type_kinds = {
+    "date": DATETIME,
+    "numbers": FLOAT,
+    "rating": INTEGER,
+    "auto_number": INTEGER,
+    "item_id": INTEGER,
+    "status": CATEGORY,
+    "color": CATEGORY,
+    "dropdown": CATEGORY,
+    "people": CATEGORY,
+    "tags": CATEGORY,
+    "country": CATEGORY,
+    "checkbox": CATEGORY,
+}
+
+# Text columns with at most this many distinct values per row become categorical
+TEXT_CATEGORY_RATIO = 0.5
+
+# Pages of a column are kept in their final representation: datetime64 and
+# float64 arrays, (int64 values, missing mask) pairs for nullable integers and
+# Categoricals, whose codes replace the repeated strings as soon as a page arrives.
+def _convert(kind, values):
+    if kind == DATETIME:
+        return pd.to_datetime(pd.Series(values, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy(dtype="datetime64[ns]")
+    if kind == FLOAT:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="float64")
+    if kind == INTEGER:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="float64")
+        # Values that are not whole numbers are treated as missing
+        missing = np.isnan(numbers) | (numbers != np.round(numbers))
+        return np.where(missing, 0, numbers).astype("int64"), missing
+    if kind == CATEGORY:
+        return pd.Categorical(values)
+    return np.array(values, dtype=object)
+
+def _empty(kind, length):
+    if kind == DATETIME:
+        return np.full(length, np.datetime64("NaT", "ns"))
+    if kind == FLOAT:
+        return np.full(length, np.nan)
+    if kind == INTEGER:
+        return np.zeros(length, dtype="int64"), np.ones(length, dtype=bool)
+    if kind == CATEGORY:
+        return pd.Categorical.from_codes(np.full(length, -1), categories=[])
+    return np.full(length, None, dtype=object)
+
+# Categories in order of first appearance
+def _union_categories(indexes):
+    categories = pd.Index([], dtype=object)
+    for index in indexes:
+        categories = categories.append(index[~index.isin(categories)].astype(object))
+    return categories
+
+def _concat(kind, chunks):
+    if not chunks:
+        chunks = [_empty(kind, 0)]
+    if kind == INTEGER:
+        return pd.arrays.IntegerArray(
+            np.concatenate([values for values, _ in chunks]),
+            np.concatenate([missing for _, missing in chunks]),
+        )
+    if kind == CATEGORY:
+        categories = _union_categories([chunk.categories for chunk in chunks])
+        codes = []
+        for chunk in chunks:
+            mapping = categories.get_indexer(chunk.categories)
+            codes.append(np.where(chunk.codes >= 0, mapping[chunk.codes] if len(mapping) else -1, -1))
+        return pd.Categorical.from_codes(np.concatenate(codes), categories=categories)
+    values = np.concatenate(chunks)
+    if kind == TEXT:
+        # Text that mostly repeats (clients, emails, labels) is stored as codes too
+        codes, uniques = pd.factorize(values)
+        if len(uniques) <= TEXT_CATEGORY_RATIO * len(values):
+            return pd.Categorical.from_codes(codes, categories=uniques)
+    return values
+
+# Builds a typed DataFrame from Monday items one page at a time. Each page is
+# converted into per-column arrays as soon as it is added, so the raw item
+# dicts can be released before the next page is fetched.
+class BoardFrameBuilder:
+    def __init__(self, schema=None, columns=None):
+        self.schema = schema or {}
+        self.columns = list(columns) if columns is not None else None
+        self.rows = 0
+        self._ids = []
+        self._names = []
+        self._chunks = {title: [] for title in self.columns or []}
+
+    def _kind(self, title):
+        return self.schema.get(title, TEXT)
+
+    # Add a page of column texts: ids, names and a dict of title -> list of texts
+    def add_columns(self, ids, names, values_by_title):
+        length = len(ids)
+        self._ids.append(_convert(INTEGER, ids))
+        self._names.append(np.array(names, dtype=object))
+        for title, values in values_by_title.items():
+            chunks = self._chunks.get(title)
+            if chunks is None:
+                if self.columns is not None:
+                    continue
+                # Column first seen on this page, earlier rows have no value
+                chunks = self._chunks[title] = [_empty(self._kind(title), self.rows)] if self.rows else []
+            chunks.append(_convert(self._kind(title), values))
+        for title, chunks in self._chunks.items():
+            if title not in values_by_title:
+                chunks.append(_empty(self._kind(title), length))
+        self.rows += length
+
+    # Add a page of items as returned by items_page
+    def add_items(self, items):
+        length = len(items)
+        values_by_title = {}
+        for i, item in enumerate(items):
+            for column_value in item['column_values']:
+                title = column_value['column']['title']
+                values = values_by_title.get(title)
+                if values is None:
+                    values = values_by_title[title] = [None] * length
+                values[i] = column_value.get('text', None)
+        self.add_columns([item['id'] for item in items], [item['name'] for item in items], values_by_title)
+
+    def build(self):
+        data = {
+            'id': _concat(INTEGER, self._ids),
+            'name': _concat(TEXT, self._names),
+        }
+        for title, chunks in self._chunks.items():
+            data[title] = _concat(self._kind(title), chunks)
+        self._ids, self._names, self._chunks = [], [], {}
+        return pd.DataFrame(data, copy=False)
+
+def _is_categorical(dtype):
+    return isinstance(dtype, CategoricalDtype)
+
+def _is_text(dtype):
+    return is_string_dtype(dtype) and not _is_categorical(dtype)
+
+def _common_dtype(dtypes):
+    if all(_is_categorical(dtype) for dtype in dtypes):
+        return CategoricalDtype(_union_categories([dtype.categories for dtype in dtypes]))
+    if all(dtype == dtypes[0] for dtype in dtypes):
+        return dtypes[0]
+    return np.dtype(object)
+
+# Combine per-board frames into one frame with a categorical 'board' column.
+# Columns are first aligned across boards: missing columns are added as typed
+# empty columns and categoricals are recoded to shared categories, so every
+# column keeps its compact dtype and the concatenation is a single copy of
+# each column's values instead of a fall back to object arrays.
+def concat_boards(frames):
+    if not frames:
+        return pd.DataFrame(columns=['board', 'id', 'name'])
+    columns = []
+    dtypes = {}
+    for frame in frames.values():
+        for column, dtype in frame.dtypes.items():
+            if column not in dtypes:
+                columns.append(column)
+                dtypes[column] = []
+            dtypes[column].append(dtype)
+
+    # Text that is categorical on some boards is made categorical on all of them
+    frames = dict(frames)
+    for column, column_dtypes in dtypes.items():
+        if any(map(_is_categorical, column_dtypes)) and all(_is_categorical(d) or _is_text(d) for d in column_dtypes):
+            for name, frame in frames.items():
+                if column in frame and _is_text(frame[column].dtype):
+                    frames[name] = frame.assign(**{column: frame[column].astype("category")})
+            dtypes[column] = [frame[column].dtype for frame in frames.values() if column in frame]
+    common = {column: _common_dtype(column_dtypes) for column, column_dtypes in dtypes.items()}
+
+    aligned = []
+    for frame in frames.values():
+        index = pd.RangeIndex(len(frame))
+        aligned.append(pd.DataFrame({
+            column: frame[column].astype(common[column], copy=False) if column in frame
+            else pd.Series(index=index, dtype=common[column])
+            for column in columns
+        }, index=index, copy=False))
+    result = pd.concat(aligned, ignore_index=True)
+    codes = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames.values()])
+    result.insert(0, 'board', pd.Categorical.from_codes(codes, categories=list(frames)))
+    return result
+
+# Memory held by a combined frame, per board: rows, total bytes (including the
+# strings of object columns) and the share of it held by object columns
+def memory_report(df):
+    if df.empty:
+        return pd.DataFrame(columns=['rows', 'bytes', 'bytes_per_row', 'text_bytes'])
+    text_columns = [column for column, dtype in df.dtypes.items() if _is_text(dtype)]
+    report = {}
+    for board, frame in df.groupby('board', observed=True, sort=False):
+        usage = frame.memory_usage(deep=True, index=False)
+        report[board] = {
+            'rows': len(frame),
+            'bytes': int(usage.sum()),
+            'bytes_per_row': usage.sum() / len(frame),
+            'text_bytes': int(usage[text_columns].sum()),
+        }
+    return pd.DataFrame.from_dict(report, orient='index').rename_axis('board')
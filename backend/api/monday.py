@@ -1,7 +1,14 @@
 import requests
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from backend import metrics
+from backend.api.scheduler import RequestScheduler
+from backend.api.board_frames import BoardFrameBuilder, column_type_kinds, concat_boards, DATETIME, FLOAT
 from dotenv import load_dotenv
 import os
+import sqlite3
+import threading
+import time
 
 # Load Env variables
 load_dotenv()
@@ -19,21 +26,102 @@ boards = {
     "sales_immigrant": 8147184384  # Added new board ID
 }
 
-# Function to fetch data and create DataFrame with pagination
-def fetch_board_data(board_id, max_items=1000):
-    all_items = []
+# Boards combined into df_sales and the columns the dashboards read from them
+sales_boards = ["sales_non_immigrant", "sales_immigrant"]
+sales_columns = ["Pmt Date", "Total Amount"]
+
+# Column kinds per board that override the defaults derived from Monday column types.
+# Kinds are DATETIME, FLOAT, INTEGER (nullable), CATEGORY and TEXT.
+board_schemas = {
+    "sales_non_immigrant": {"Pmt Date": DATETIME, "Total Amount": FLOAT},
+    "sales_immigrant": {"Pmt Date": DATETIME, "Total Amount": FLOAT},
+}
+board_names = {board_id: name for name, board_id in boards.items()}
+
+# Shared keep-alive session so page requests reuse pooled connections
+session = requests.Session()
+session.headers.update(headers)
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(boards)))
+
+# Every Monday request goes through the scheduler, which paces and retries them
+scheduler = RequestScheduler(session, apiUrl, max_concurrent=len(boards))
+
+# Complexity feedback requested alongside every query
+COMPLEXITY_FIELD = "complexity { query after reset_in_x_seconds }"
+
+# Column ids and types per board, fetched once
+_board_columns = {}
+_board_columns_lock = threading.Lock()
+
+def _post_query(query):
+    return scheduler.post(query)
+
+# Return {title: {'id': ..., 'type': ...}} for every column of a board
+def get_board_columns(board_id):
+    with _board_columns_lock:
+        columns = _board_columns.get(board_id)
+    if columns is None:
+        response = _post_query(f'query {{ {COMPLEXITY_FIELD} boards(ids: {board_id}) {{ columns {{ id title type }} }} }}')
+        if 'data' not in response or not response['data']['boards']:
+            raise ValueError(f"Failed to fetch columns from board {board_id}: {response}")
+        columns = {c['title']: {'id': c['id'], 'type': c.get('type')} for c in response['data']['boards'][0]['columns']}
+        with _board_columns_lock:
+            _board_columns[board_id] = columns
+    return columns
+
+# Map column titles to Monday column ids for a board
+def resolve_column_ids(board_id, titles):
+    columns = get_board_columns(board_id)
+    missing = [title for title in titles if title not in columns]
+    if missing:
+        raise ValueError(f"Board {board_id} has no columns {missing}")
+    return [columns[title]['id'] for title in titles]
+
+# Column kinds from {title: Monday column type}, plus the board_schemas overrides
+def board_schema_from_types(board_id, column_types):
+    schema = {
+        title: column_type_kinds[column_type]
+        for title, column_type in column_types.items()
+        if column_type in column_type_kinds
+    }
+    schema.update(board_schemas.get(board_names.get(board_id), {}))
+    return schema
+
+# Column kinds of a board: defaults from the Monday column types plus board_schemas overrides
+def get_board_schema(board_id):
+    columns = get_board_columns(board_id)
+    return board_schema_from_types(board_id, {title: column['type'] for title, column in columns.items()})
+
+# Yield the items of a board page by page, optionally only those updated on or after a date.
+# With column_ids only those column values are requested.
+def iter_board_items(board_id, updated_since=None, column_ids=None):
+    column_filter = ''
+    if column_ids is not None:
+        column_filter = '(ids: [' + ', '.join(f'"{column_id}"' for column_id in column_ids) + '])'
     cursor = None
-    items_fetched = 0
-    while items_fetched < max_items:
+    while True:
+        # The cursor already encodes the query params of the first page
+        if cursor:
+            page_args = f'limit: 500, cursor: "{cursor}"'
+        elif updated_since:
+            page_args = (
+                'limit: 500, query_params: {rules: [{column_id: "__last_updated__", '
+                f'compare_value: ["EXACT", "{updated_since}"], operator: greater_than_or_equals, '
+                'compare_attribute: "UPDATED_AT"}]}'
+            )
+        else:
+            page_args = 'limit: 500'
         query = f'''
         query GetBoardItems {{
+        {COMPLEXITY_FIELD}
         boards(ids: {board_id}) {{
-        items_page(limit: 500{', cursor: "' + cursor + '"' if cursor else ''}) {{
+        items_page({page_args}) {{
         cursor
         items {{
         id
         name
-        column_values {{
+        updated_at
+        column_values{column_filter} {{
         column {{
         title
         }}
@@ -44,9 +132,8 @@ def fetch_board_data(board_id, max_items=1000):
         }}
         }}
         '''
-        raw_data = {'query': query}
-        r = requests.post(url=apiUrl, json=raw_data, headers=headers)
-        response = r.json()
+        with metrics.span("monday_page", board=board_id):
+            response = _post_query(query)
         
         # Handle potential errors in API response
         if 'data' not in response or not response['data']['boards']:
@@ -55,30 +142,115 @@ def fetch_board_data(board_id, max_items=1000):
         board_data = response['data']['boards'][0]['items_page']
         items = board_data['items']
         cursor = board_data['cursor']
-        all_items.extend(items)
-        items_fetched += len(items)
+        del response, board_data
+        metrics.count("monday_items", len(items), board=board_id)
+        yield items
         
         # Stop if no more items are returned
         if not cursor or len(items) == 0:
             break
-    
-    # Process items into a DataFrame
-    columns = set()
-    data_list = []
-    for item in all_items:
-        item_data = {'id': item['id'], 'name': item['name']}
-        for column_value in item['column_values']:
-            column_title = column_value['column']['title']
-            columns.add(column_title)
-            item_data[column_title] = column_value.get('text', None)
-        data_list.append(item_data)
-    
-    df = pd.DataFrame(data_list, columns=['id', 'name'] + list(columns))
+        del items
+
+# Function to fetch data and create a typed DataFrame with pagination.
+# `columns` limits the result to the given column titles.
+def fetch_board_data(board_id, max_items=None, columns=None):
+    column_ids = resolve_column_ids(board_id, columns) if columns is not None else None
+    builder = BoardFrameBuilder(get_board_schema(board_id), columns)
+    for items in iter_board_items(board_id, column_ids=column_ids):
+        if max_items is not None:
+            items = items[:max_items - builder.rows]
+        with metrics.span("transform", step="board_page"):
+            builder.add_items(items)
+        if max_items is not None and builder.rows >= max_items:
+            break
+    with metrics.span("transform", step="board_frame"):
+        return builder.build()
+
+# Fetch several boards in parallel and combine them into one DataFrame
+def fetch_boards(names=None, max_items=None, max_workers=None, columns=None):
+    names = list(boards) if names is None else list(names)
+    unknown = [name for name in names if name not in boards]
+    if unknown:
+        raise ValueError(f"Unknown boards: {unknown}")
+    if not names:
+        return concat_boards({})
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as executor:
+        frames = list(executor.map(lambda name: fetch_board_data(boards[name], max_items, columns), names))
+
+    # Rows are tagged with the board they came from
+    return concat_boards(dict(zip(names, frames)))
+
+# Sales data is fetched lazily and kept for SALES_TTL seconds
+SALES_TTL = float(os.getenv("MONDAY_SALES_TTL", 900))
+
+_sales_lock = threading.Lock()
+_sales_snapshot = None  # (fetched_at, DataFrame)
+_sales_refresh = None  # background refresh thread while one is running
+_sales_local_checked = False  # whether the local snapshot was tried at startup
+
+def _refresh_sales():
+    global _sales_snapshot, _sales_refresh
+    try:
+        # Imported here because the sync engine builds on this module
+        from backend.sync.monday import sync_boards
+        df = sync_boards(sales_boards, columns=sales_columns)
+        with _sales_lock:
+            _sales_snapshot = (time.monotonic(), df)
+    except Exception:
+        # Keep serving the snapshot we have and retry after another SALES_TTL
+        with _sales_lock:
+            if _sales_snapshot is not None:
+                _sales_snapshot = (time.monotonic(), _sales_snapshot[1])
+        raise
+    finally:
+        with _sales_lock:
+            _sales_refresh = None
     return df
 
-# Fetch data for sales board and new board
-df_sales_1 = fetch_board_data(boards['sales_non_immigrant'])
-df_sales_2 = fetch_board_data(boards['sales_immigrant'])
+def _load_local_sales():
+    from backend.sync.monday import load_boards
+    try:
+        return load_boards(sales_boards, columns=sales_columns)
+    except (sqlite3.Error, ValueError):
+        return None
+
+def _start_refresh():
+    global _sales_refresh
+    if _sales_refresh is None:
+        _sales_refresh = threading.Thread(target=_refresh_sales, daemon=True)
+        _sales_refresh.start()
+    return _sales_refresh
+
+# Return the combined sales DataFrame. Once a snapshot exists it is returned
+# right away; an expired one triggers a single background refresh. A new process
+# starts from the boards last synced to SQLite and refreshes them in the background.
+def get_df_sales(ttl=None):
+    global _sales_snapshot, _sales_local_checked
+    ttl = SALES_TTL if ttl is None else ttl
+    with _sales_lock:
+        if _sales_snapshot is None and not _sales_local_checked:
+            _sales_local_checked = True
+            df = _load_local_sales()
+            if df is not None:
+                # Stale from the start, so the first call already refreshes it
+                _sales_snapshot = (float("-inf"), df)
+        snapshot = _sales_snapshot
+        if snapshot is not None:
+            fetched_at, df = snapshot
+            if time.monotonic() - fetched_at >= ttl:
+                _start_refresh()
+            return df
+        refresh = _start_refresh()
+
+    # No snapshot yet, callers wait for the first fetch to finish
+    refresh.join()
+    if _sales_snapshot is None:
+        raise ValueError("Failed to fetch sales data from Monday")
+    return _sales_snapshot[1]
 
-# Combine DataFrames
-df_sales = pd.concat([df_sales_1, df_sales_2], ignore_index=True)
\ No newline at end of file
+# Keep `from backend.api.monday import df_sales` working without fetching at import
+def __getattr__(name):
+    if name == "df_sales":
+        return get_df_sales()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,406 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from backend import metrics
+from backend.analytics.cube import record_payments
+
+# Columns of the payments table
+PAYMENT_COLUMNS = [
+    "id",
+    "created_at",
+    "payment_value",
+    "payment_category",
+    "payment_date",
+    "payment_agent",
+    "payment_description",
+]
+
+# Columns a payment is uploaded with; together they identify a payment for deduplication
+UPLOAD_COLUMNS = [
+    "payment_value",
+    "payment_category",
+    "payment_date",
+    "payment_agent",
+    "payment_description",
+]
+REQUIRED_COLUMNS = ["payment_value", "payment_category", "payment_date"]
+
+# Rows per insert request when uploading payments
+UPLOAD_CHUNK_SIZE = int(os.getenv("PAYMENTS_UPLOAD_CHUNK_SIZE", 500))
+
+# Postgres function returning payment totals per day and category (backend/sql/payments_daily_totals.sql)
+DAILY_TOTALS_RPC = "payments_daily_totals"
+DAILY_TOTALS_COLUMNS = ["payment_date", "payment_category", "payment_value", "payments"]
+
+# Rows requested per page; PostgREST may return fewer (Supabase caps responses at 1000 rows)
+PAGE_SIZE = int(os.getenv("PAYMENTS_PAGE_SIZE", 1000))
+
+# How long a cached month is trusted before it is fetched again
+PAYMENTS_CACHE_TTL = float(os.getenv("PAYMENTS_CACHE_TTL", 600))
+
+def _month_start(date):
+    return pd.Timestamp(date).to_period("M").to_timestamp()
+
+def _months(start, end):
+    # Month starts covering [start, end)
+    return list(pd.date_range(_month_start(start), pd.Timestamp(end) - pd.Timedelta(days=1), freq="MS"))
+
+# Count the rows (the returned ones unless given) and the size of a Supabase response.
+# The client only exposes the decoded rows, so the size is measured from their JSON
+# while metrics are enabled.
+def record_response(data, op, rows=None):
+    data = data or []
+    metrics.count("supabase_rows", len(data) if rows is None else rows, op=op)
+    if metrics.is_enabled():
+        metrics.count("supabase_bytes_received", len(json.dumps(data, default=str)), op=op)
+
+# Turn PostgREST rows into a typed payments DataFrame
+def payments_frame(rows):
+    df = pd.DataFrame(rows) if rows else pd.DataFrame(columns=PAYMENT_COLUMNS)
+    if "payment_date" in df:
+        df["payment_date"] = pd.to_datetime(df["payment_date"])
+    if "payment_value" in df:
+        df["payment_value"] = pd.to_numeric(df["payment_value"], errors="coerce")
+    return df
+
+# Stream payments with start <= payment_date < end as typed DataFrame chunks. Pages
+# are read in id order using the last id seen as the cursor, so the result is
+# complete however many rows the server allows per response.
+def iter_payments(client, table_name, start=None, end=None, page_size=None, columns="*"):
+    page_size = page_size or PAGE_SIZE
+    last_id = None
+    while True:
+        query = client.table(table_name).select(columns)
+        if start is not None:
+            query = query.filter("payment_date", "gte", pd.Timestamp(start).strftime("%Y-%m-%d"))
+        if end is not None:
+            query = query.filter("payment_date", "lt", pd.Timestamp(end).strftime("%Y-%m-%d"))
+        if last_id is not None:
+            query = query.filter("id", "gt", last_id)
+        with metrics.span("supabase", op="select"):
+            rows = query.order("id").limit(page_size).execute().data
+        record_response(rows, "select")
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        yield payments_frame(rows)
+
+# Read every payment with start <= payment_date < end. The range is split into
+# monthly shards that are paged through concurrently.
+def fetch_payments(client, table_name, start, end, max_workers=4, page_size=None):
+    shards = [(max(m, pd.Timestamp(start)), min(m + pd.offsets.MonthBegin(1), pd.Timestamp(end))) for m in _months(start, end)]
+    if not shards:
+        return payments_frame([])
+
+    def read(shard):
+        return list(iter_payments(client, table_name, shard[0], shard[1], page_size=page_size))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards)))) as executor:
+        chunks = [chunk for shard_chunks in executor.map(read, shards) for chunk in shard_chunks]
+    if not chunks:
+        return payments_frame([])
+    return pd.concat(chunks, ignore_index=True)
+
+# Payments cached per calendar month. Missing months are loaded with a single
+# range query spanning all of them, and periods are served by slicing the cache.
+class PaymentsCache:
+    def __init__(self, client, table_name, ttl=None):
+        self.client = client
+        self.table_name = table_name
+        self.ttl = PAYMENTS_CACHE_TTL if ttl is None else ttl
+        self._months = {}  # month start -> (fetched_at, DataFrame)
+        self._lock = threading.Lock()
+
+    def _missing(self, months):
+        now = time.monotonic()
+        with self._lock:
+            return [m for m in months if m not in self._months or now - self._months[m][0] >= self.ttl]
+
+    def _load(self, first, last):
+        df = fetch_payments(self.client, self.table_name, first, last + pd.offsets.MonthBegin(1))
+        by_month = dict(list(df.groupby(df["payment_date"].dt.to_period("M").dt.to_timestamp())))
+        fetched_at = time.monotonic()
+        with self._lock:
+            for month in pd.date_range(first, last, freq="MS"):
+                self._months[month] = (fetched_at, by_month.get(month, df.iloc[0:0]))
+
+    # Payments with start <= payment_date < end (dates as "YYYY-MM-DD" strings or timestamps)
+    def fetch(self, start, end):
+        months = _months(start, end)
+        missing = self._missing(months)
+        if missing:
+            self._load(min(missing), max(missing))
+
+        with self._lock:
+            frames = [self._months[m][1] for m in months if m in self._months]
+        if not frames:
+            return payments_frame([])
+        df = pd.concat(frames, ignore_index=True)
+        return df[(df["payment_date"] >= pd.Timestamp(start)) & (df["payment_date"] < pd.Timestamp(end))]
+
+    # Forget cached months containing the given dates, or every month when none are given
+    def invalidate(self, dates=None):
+        with self._lock:
+            if dates is None:
+                self._months.clear()
+                return
+            for date in pd.to_datetime(pd.Series(list(dates))).dropna():
+                self._months.pop(_month_start(date), None)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+# Process-wide cache per table, shared by the Finance and Accounting pages
+def get_payments_cache(client, table_name):
+    with _caches_lock:
+        cache = _caches.get(table_name)
+        if cache is None:
+            cache = _caches[table_name] = PaymentsCache(client, table_name)
+        return cache
+
+# Group payment rows into totals per day and category, like the payments_daily_totals function
+def daily_totals(payments):
+    if payments.empty:
+        return pd.DataFrame({
+            "payment_date": pd.Series(dtype="datetime64[ns]"),
+            "payment_category": pd.Series(dtype=object),
+            "payment_value": pd.Series(dtype="float64"),
+            "payments": pd.Series(dtype="int64"),
+        })
+    return payments.groupby([payments["payment_date"].dt.normalize(), "payment_category"]).agg(
+        payment_value=("payment_value", "sum"),
+        payments=("payment_value", "size"),
+    ).reset_index()
+
+# Supabase projects and tables whose database has no payments_daily_totals function
+_rpc_unavailable = set()
+
+# Whether an RPC error means the function does not exist: PostgREST answers
+# PGRST202 (HTTP 404) when no function matches the name and arguments
+def _is_missing_function(error):
+    return getattr(error, "code", None) in ("PGRST202", 404, "404")
+
+# Payment totals per day and category for start <= payment_date < end. The grouping
+# runs in Postgres; when the function is missing (e.g. a local database without the
+# migration) the rows are fetched and grouped here instead. Other errors are raised.
+def fetch_daily_totals(client, table_name, start, end):
+    # Keyed by project URL, as pages build a new client on every rerun
+    key = (getattr(client, "supabase_url", None), table_name)
+    if key not in _rpc_unavailable:
+        params = {
+            "start_date": pd.Timestamp(start).strftime("%Y-%m-%d"),
+            "end_date": pd.Timestamp(end).strftime("%Y-%m-%d"),
+        }
+        rows = []
+        try:
+            # The function's result is ordered, so offset pages are stable
+            while True:
+                with metrics.span("supabase", op="rpc"):
+                    page = client.rpc(DAILY_TOTALS_RPC, params).range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+                record_response(page, "rpc")
+                if not page:
+                    break
+                rows.extend(page)
+        except Exception as e:
+            if not _is_missing_function(e):
+                raise
+            _rpc_unavailable.add(key)
+        else:
+            df = pd.DataFrame(rows, columns=DAILY_TOTALS_COLUMNS)
+            df["payment_date"] = pd.to_datetime(df["payment_date"])
+            df["payment_value"] = pd.to_numeric(df["payment_value"]).astype("float64")
+            df["payments"] = df["payments"].astype("int64")
+            return df
+    return daily_totals(get_payments_cache(client, table_name).fetch(start, end))
+
+# The largest payments for start <= payment_date < end. Payments without a value
+# are left out; Postgres would sort them first in descending order.
+def fetch_top_payments(client, table_name, start, end, limit=5):
+    with metrics.span("supabase", op="top_payments"):
+        response = client.table(table_name) \
+            .select("payment_date, payment_category, payment_description, payment_value") \
+            .filter("payment_date", "gte", pd.Timestamp(start).strftime("%Y-%m-%d")) \
+            .filter("payment_date", "lt", pd.Timestamp(end).strftime("%Y-%m-%d")) \
+            .filter("payment_value", "not.is", "null") \
+            .order("payment_value", desc=True) \
+            .limit(limit) \
+            .execute()
+    record_response(response.data, "top_payments")
+    return payments_frame(response.data)[["payment_date", "payment_category", "payment_description", "payment_value"]]
+
+# Accounting metrics for start <= payment_date < end, computed from the grouped totals
+def payments_summary(client, table_name, start, end):
+    totals = fetch_daily_totals(client, table_name, start, end)
+    count = int(totals["payments"].sum())
+    total_cost = float(totals["payment_value"].sum())
+    by_category = totals.groupby("payment_category").agg(
+        payment_value=("payment_value", "sum"),
+        payments=("payments", "sum"),
+    )
+    # Same tie-break as Series.mode: the lowest category among the most frequent
+    most_frequent = by_category.sort_index().sort_values("payments", ascending=False, kind="stable")
+    return {
+        "total_cost": total_cost,
+        "count": count,
+        "average": total_cost / count if count else 0,
+        "most_frequent_category": most_frequent.index[0] if count else "None",
+        "by_category": by_category["payment_value"],
+        "by_date": totals.groupby("payment_date")["payment_value"].sum(),
+        "top_payments": fetch_top_payments(client, table_name, start, end) if count else pd.DataFrame(
+            columns=["payment_date", "payment_category", "payment_description", "payment_value"]
+        ),
+    }
+
+# Validate and coerce an uploaded frame in one pass. Returns (valid, invalid) where
+# invalid keeps the original rows plus an "error" column explaining the rejection.
+def prepare_payments(df):
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    prepared = pd.DataFrame(index=df.index)
+    prepared["payment_value"] = pd.to_numeric(df["payment_value"], errors="coerce").round(2)
+    prepared["payment_category"] = df["payment_category"].astype("string").str.strip()
+    prepared["payment_date"] = pd.to_datetime(df["payment_date"], format="mixed", errors="coerce").dt.strftime("%Y-%m-%d")
+    for column in ("payment_agent", "payment_description"):
+        values = df[column] if column in df.columns else pd.Series("", index=df.index)
+        prepared[column] = values.astype("string").fillna("").str.strip()
+
+    error = pd.Series(pd.NA, index=df.index, dtype="string")
+    error = error.mask(prepared["payment_category"].fillna("") == "", "missing payment_category")
+    error = error.mask(prepared["payment_date"].isna(), "invalid payment_date")
+    error = error.mask(prepared["payment_value"].isna(), "invalid payment_value")
+    bad = error.notna()
+
+    invalid = df[bad].assign(error=error[bad])
+    return prepared[~bad], invalid
+
+# Content hash per payment. Identical rows within one upload get their occurrence
+# number mixed in, so they stay distinct while a re-upload of the same file maps
+# onto the same hashes. When an upload is hashed in chunks, pass the same `seen`
+# dict to every call so occurrence numbers continue across chunks; it is keyed by
+# a 16-byte digest of each distinct payment rather than its full content.
+def payment_hashes(prepared, seen=None):
+    if prepared.empty:
+        return pd.Series(index=prepared.index, dtype=object)
+    keys = prepared["payment_value"].map("{:.2f}".format)
+    for column in UPLOAD_COLUMNS[1:]:
+        keys = keys + "\x1f" + prepared[column].astype(str)
+    occurrence = keys.groupby(keys).cumcount()
+    if seen is not None:
+        digests = keys.map(lambda key: hashlib.sha256(key.encode()).digest()[:16])
+        occurrence = occurrence + digests.map(seen).fillna(0).astype("int64")
+        for digest, n in digests.value_counts().items():
+            seen[digest] = seen.get(digest, 0) + n
+    keys = keys + "\x1f" + occurrence.astype(str)
+    return keys.map(lambda key: hashlib.sha256(key.encode()).hexdigest())
+
+# Rows already in the table (same row_hash) are skipped, see backend/sql/payments_row_hash.sql
+def _upload_chunk(client, table_name, rows):
+    with metrics.span("supabase", op="upsert"):
+        response = client.table(table_name).upsert(rows, on_conflict="row_hash", ignore_duplicates=True).execute()
+    record_response(response.data, "upload", rows=len(rows))
+    return response.data or []
+
+def _send_prepared(client, table_name, prepared, chunk_size, max_workers):
+    # Returns (inserted rows, failed chunks, number of rows in failed chunks)
+    records = prepared.astype(object).where(prepared.notna(), None).to_dict(orient="records")
+    positions = list(prepared.index)
+    chunks = [(i, records[i:i + chunk_size]) for i in range(0, len(records), chunk_size)]
+
+    def run(chunk):
+        start, rows = chunk
+        try:
+            return _upload_chunk(client, table_name, rows), None
+        except Exception as e:
+            return [], {"rows": (positions[start], positions[start + len(rows) - 1]), "error": str(e)}
+
+    sent_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks) or 1))) as executor:
+        results = list(executor.map(run, chunks))
+
+    failed = [failure for _, failure in results if failure is not None]
+    inserted = [row for rows, _ in results for row in rows]
+    failed_rows = sum(
+        len(rows) for (start, rows), (_, failure) in zip(chunks, results) if failure is not None
+    )
+    get_payments_cache(client, table_name).invalidate(prepared["payment_date"])
+    record_payments(inserted, sent_at)
+    return inserted, failed, failed_rows
+
+# Column types used when reading payment CSVs; values are coerced by prepare_payments
+CSV_DTYPES = {column: "string" for column in UPLOAD_COLUMNS}
+
+# Rows read from an uploaded CSV at a time
+IMPORT_CHUNK_ROWS = int(os.getenv("PAYMENTS_IMPORT_CHUNK_ROWS", 20000))
+
+# Invalid rows kept for display; the rest are only counted
+MAX_INVALID_SAMPLES = 100
+
+def _index_key(row_hash):
+    # The first 16 bytes of the digest are plenty to tell payments apart
+    return bytes.fromhex(row_hash[:32])
+
+# Hash keys of every payment already in the table. Rows uploaded before row_hash
+# existed are hashed from their content, numbered in id order.
+def load_payment_hash_index(client, table_name):
+    index = set()
+    seen = {}
+    columns = "id, " + ", ".join(UPLOAD_COLUMNS) + ", row_hash"
+    for chunk in iter_payments(client, table_name, columns=columns):
+        stored = chunk["row_hash"].dropna() if "row_hash" in chunk else pd.Series(dtype=object)
+        index.update(_index_key(h) for h in stored)
+        legacy = chunk[chunk["row_hash"].isna()] if "row_hash" in chunk else chunk
+        if not legacy.empty:
+            prepared, _ = prepare_payments(legacy)
+            index.update(_index_key(h) for h in payment_hashes(prepared, seen))
+    return index
+
+# Stream a payments CSV into the table chunk by chunk. Each chunk is validated,
+# hashed and checked against the index of existing payments; only new rows are
+# sent. Besides the current chunk, memory holds the index and 16 bytes plus a
+# count per distinct payment read so far. `on_progress(rows_read, result)` is
+# called after every chunk. Returns a dict with the number of uploaded and skipped
+# rows, "invalid" holding at most MAX_INVALID_SAMPLES rejected rows, "invalid_count"
+# the total, and every failed chunk as {"rows": (first, last), "error": message}
+# using CSV row positions.
+def import_payments_csv(client, table_name, csv_file, chunk_rows=None, chunk_size=None, max_workers=4, on_progress=None):
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    with metrics.span("supabase", op="hash_index"):
+        index = load_payment_hash_index(client, table_name)
+
+    result = {"uploaded": 0, "skipped": 0, "invalid": pd.DataFrame(), "invalid_count": 0, "failed_chunks": []}
+    seen = {}
+    rows_read = 0
+    reader = pd.read_csv(
+        csv_file,
+        dtype=CSV_DTYPES,
+        usecols=lambda column: column in UPLOAD_COLUMNS,
+        chunksize=chunk_rows or IMPORT_CHUNK_ROWS,
+    )
+    for chunk in reader:
+        with metrics.span("transform", step="prepare_import"):
+            prepared, invalid = prepare_payments(chunk)
+            prepared["row_hash"] = payment_hashes(prepared, seen)
+            # Plain set lookups: Series.isin would turn the keys into fixed-width
+            # numpy bytes, which drops trailing NUL bytes
+            new = pd.Series([_index_key(h) not in index for h in prepared["row_hash"]], index=prepared.index, dtype=bool)
+
+        if new.any():
+            inserted, failed, _ = _send_prepared(client, table_name, prepared[new], chunk_size, max_workers)
+            result["uploaded"] += len(inserted)
+            result["failed_chunks"].extend(failed)
+            index.update(_index_key(row["row_hash"]) for row in inserted)
+        result["skipped"] += int((~new).sum())
+        result["invalid_count"] += len(invalid)
+        if len(result["invalid"]) < MAX_INVALID_SAMPLES and not invalid.empty:
+            result["invalid"] = pd.concat([result["invalid"], invalid]).head(MAX_INVALID_SAMPLES)
+
+        rows_read += len(chunk)
+        if on_progress is not None:
+            on_progress(rows_read, result)
+    return result
@@ -0,0 +1,145 @@
+import random
+import re
+import threading
+import time
+import requests
+from backend import metrics
+
+# Monday error codes that mean "slow down and try again"
+THROTTLE_CODES = {
+    "ComplexityException",
+    "COMPLEXITY_BUDGET_EXHAUSTED",
+    "RATE_LIMIT_EXCEEDED",
+    "Rate Limit Exceeded",
+    "maxConcurrencyExceeded",
+    "FIELD_MINUTE_RATE_LIMIT_EXCEEDED",
+    "IP_RATE_LIMIT_EXCEEDED",
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_reset_pattern = re.compile(r"reset in (\d+) seconds?")
+
+def _throttle_wait(response):
+    # Seconds Monday asked us to wait (0.0 when it gave no hint), or None when
+    # the response is not a throttle
+    errors = list(response.get('errors') or [])
+    if 'error_code' in response:
+        errors.append({'message': response.get('error_message', ''), 'extensions': {'code': response['error_code']}})
+    for error in errors:
+        extensions = error.get('extensions') or {}
+        code = extensions.get('code') or error.get('code')
+        message = str(error.get('message', ''))
+        if code in THROTTLE_CODES or 'rate limit' in message.lower() or 'complexity budget' in message.lower():
+            if extensions.get('retry_in_seconds') is not None:
+                return float(extensions['retry_in_seconds'])
+            match = _reset_pattern.search(message)
+            return float(match.group(1)) if match else 0.0
+    return None
+
+# Sends GraphQL queries for every board fetch through one place. It keeps track of
+# the complexity budget Monday reports, holds requests back while the budget is
+# exhausted or Monday throttles us, and retries transient failures with jittered
+# exponential backoff.
+class RequestScheduler:
+    def __init__(self, session, url, max_retries=5, base_delay=1.0, max_delay=60.0, max_concurrent=4, timeout=60):
+        self.session = session
+        self.url = url
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._budget = None  # complexity left after the last response
+        self._budget_reset_at = 0.0
+        self._last_cost = 0
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "throttle_waits": 0,
+            "throttle_wait_seconds": 0.0,
+            "complexity_used": 0,
+        }
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+        metrics.count(f"monday_{name}", value)
+
+    def _wait_for_budget(self):
+        with self._lock:
+            now = time.monotonic()
+            until = self._paused_until
+            # Not enough budget left for another query like the last one
+            if self._budget is not None and self._budget < self._last_cost and self._budget_reset_at > now:
+                until = max(until, self._budget_reset_at)
+        delay = until - time.monotonic()
+        if delay > 0:
+            self._count("throttle_waits")
+            self._count("throttle_wait_seconds", delay)
+            time.sleep(delay)
+
+    def _pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _record_complexity(self, response):
+        complexity = (response.get('data') or {}).get('complexity')
+        if not complexity:
+            return
+        with self._lock:
+            if complexity.get('query') is not None:
+                self._last_cost = complexity['query']
+                self.counters["complexity_used"] += complexity['query']
+            if complexity.get('after') is not None:
+                self._budget = complexity['after']
+            if complexity.get('reset_in_x_seconds') is not None:
+                self._budget_reset_at = time.monotonic() + complexity['reset_in_x_seconds']
+
+    # Send a query and return the decoded JSON response
+    def post(self, query):
+        attempt = 0
+        while True:
+            self._wait_for_budget()
+            wait = None
+            with self._slots:
+                self._count("requests")
+                try:
+                    r = self.session.post(url=self.url, json={'query': query}, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                else:
+                    error = None
+                    if r.status_code in RETRY_STATUS:
+                        retry_after = r.headers.get('Retry-After')
+                        if r.status_code == 429 and retry_after and retry_after.isdigit():
+                            wait = float(retry_after)
+                        error = ValueError(f"Monday API returned HTTP {r.status_code}")
+                    else:
+                        metrics.count("monday_bytes_received", len(r.content))
+                        response = r.json()
+                        throttle = _throttle_wait(response)
+                        if throttle is None:
+                            self._record_complexity(response)
+                            return response
+                        wait = throttle
+                        error = ValueError(f"Monday API throttled the request: {response}")
+
+            if attempt >= self.max_retries:
+                raise ValueError(f"Monday API request failed after {attempt + 1} attempts: {error}") from error
+            if wait:
+                # Throttles apply to every concurrent fetch, not just this one
+                self._pause(wait + random.uniform(0, self.base_delay))
+            else:
+                # No wait was reported, back off exponentially
+                time.sleep(self._backoff(attempt))
+            self._count("retries")
+            attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+from backend import metrics
+
+# Process-wide cache shared by every Streamlit session. Keys are tuples whose first
+# element is a namespace ("payments", ...) that can be invalidated as a whole.
+# Concurrent requests for a missing key share a single load, and the least recently
+# used entries are evicted once the entry or byte budget is exceeded.
+
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 512))
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", 256 * 2 ** 20))
+
+def _size(value):
+    # Rough footprint in bytes, good enough to bound the cache
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class SharedCache:
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries or SHARED_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or SHARED_CACHE_MAX_BYTES
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._inflight = {}  # key -> Future
+        self._generations = {}  # namespace -> invalidation count
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            metrics.count("shared_cache_evictions")
+
+    # Return the cached value for key, calling loader() at most once across all
+    # concurrent callers when it is missing or older than ttl seconds
+    def get_or_load(self, key, loader, ttl=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                metrics.count("shared_cache_hits", namespace=key[0])
+                return entry[2]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                generation = self._generations.get(key[0], 0)
+
+        if not owner:
+            metrics.count("shared_cache_coalesced", namespace=key[0])
+            return future.result()
+
+        metrics.count("shared_cache_misses", namespace=key[0])
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Results loaded across an invalidation may already be stale, hand
+            # them to the waiting callers but do not keep them
+            if self._generations.get(key[0], 0) == generation:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[1]
+                size = _size(value)
+                expires_at = time.monotonic() + ttl if ttl is not None else None
+                self._entries[key] = (expires_at, size, value)
+                self._bytes += size
+                self._evict()
+        future.set_result(value)
+        return value
+
+    # Drop every entry of a namespace, or everything when no namespace is given
+    def invalidate(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                for name in set(self._generations) | {key[0] for key in self._entries}:
+                    self._generations[name] = self._generations.get(name, 0) + 1
+                self._entries.clear()
+                self._bytes = 0
+                return
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [key for key in self._entries if key[0] == namespace]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "inflight": len(self._inflight)}
+
+shared_cache = SharedCache()
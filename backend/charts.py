@@ -0,0 +1,49 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from matplotlib.figure import Figure
+from backend import metrics
+
+# Rendered charts kept in memory, least recently used ones are dropped first
+MAX_CACHED_CHARTS = int(os.getenv("MAX_CACHED_CHARTS", 64))
+
+_charts = OrderedDict()
+_charts_lock = threading.Lock()
+
+def _chart_key(kind, labels, values):
+    data = repr((kind, [str(label) for label in labels], [float(value) for value in values]))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def _render_pie(labels, values):
+    # Figure is used directly instead of pyplot so nothing is registered in
+    # pyplot's global figure list; the figure is freed once the PNG is written.
+    fig = Figure()
+    try:
+        ax = fig.subplots()
+        ax.pie(values, labels=labels, autopct='%1.1f%%')
+        ax.axis('equal')
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+# PNG bytes of a pie chart, rendered only when this data has not been drawn before
+def pie_chart_png(labels, values):
+    labels, values = list(labels), list(values)
+    key = _chart_key("pie", labels, values)
+    with _charts_lock:
+        png = _charts.get(key)
+        if png is not None:
+            _charts.move_to_end(key)
+            return png
+
+    with metrics.span("render", chart="pie_png"):
+        png = _render_pie(labels, values)
+    with _charts_lock:
+        _charts[key] = png
+        while len(_charts) > MAX_CACHED_CHARTS:
+            _charts.popitem(last=False)
+    return png
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Timed spans and counters for the fetch, transform and render stages. Recording is
+# off unless METRICS_ENABLED is set (or enable() is called); while off, span() hands
+# back a shared no-op context manager and count() returns immediately.
+
+_enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_spans = {}  # (name, labels) -> {"count", "sum", "max"}
+_counters = {}  # (name, labels) -> value
+_noop = nullcontext()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+@contextmanager
+def _timed(key):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            stats = _spans.get(key)
+            if stats is None:
+                stats = _spans[key] = {"count": 0, "sum": 0.0, "max": 0.0}
+            stats["count"] += 1
+            stats["sum"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+# Time a block: `with span("supabase", op="select"): ...`
+def span(name, **labels):
+    if not _enabled:
+        return _noop
+    return _timed(_key(name, labels))
+
+# Add to a counter, e.g. count("monday_bytes_received", len(body), board=board_id)
+def count(name, value=1, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+# Current values as a list of dicts, one per span or counter series
+def snapshot():
+    with _lock:
+        spans = [
+            {"type": "span", "name": name, "labels": dict(labels), **stats}
+            for (name, labels), stats in _spans.items()
+        ]
+        counters = [
+            {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+    return sorted(spans, key=lambda s: s["name"]) + sorted(counters, key=lambda c: c["name"])
+
+def to_json_lines():
+    return "".join(json.dumps(series) + "\n" for series in snapshot())
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+# Prometheus text exposition format; spans become a summary in seconds plus a gauge for the slowest run
+def to_prometheus():
+    families = {}
+    for series in snapshot():
+        labels = _prometheus_labels(series["labels"])
+        if series["type"] == "span":
+            name = f"ustay_{series['name']}_seconds"
+            families.setdefault((name, "summary"), []).extend([
+                f"{name}_count{labels} {series['count']}",
+                f"{name}_sum{labels} {series['sum']:.6f}",
+            ])
+            families.setdefault((f"{name}_max", "gauge"), []).append(f"{name}_max{labels} {series['max']:.6f}")
+        else:
+            name = f"ustay_{series['name']}_total"
+            families.setdefault((name, "counter"), []).append(f"{name}{labels} {series['value']}")
+
+    lines = []
+    for (name, kind), samples in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
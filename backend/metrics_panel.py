@@ -0,0 +1,35 @@
+import pandas as pd
+import streamlit as st
+from backend import metrics
+from backend.api.board_frames import memory_report
+
+# Debug panel in the sidebar listing the recorded spans and counters, with exports.
+# `boards` maps a label to a combined board frame whose memory use is listed per board.
+# Shown only while metrics are enabled.
+def render_metrics_sidebar(boards=None):
+    if not metrics.is_enabled():
+        return
+    series = metrics.snapshot()
+    with st.sidebar.expander("🛠️ Debug: Timings"):
+        spans = [s for s in series if s["type"] == "span"]
+        counters = [s for s in series if s["type"] == "counter"]
+        if spans:
+            st.dataframe(pd.DataFrame({
+                "span": [s["name"] for s in spans],
+                "labels": [", ".join(f"{k}={v}" for k, v in s["labels"].items()) for s in spans],
+                "count": [s["count"] for s in spans],
+                "total ms": [s["sum"] * 1000 for s in spans],
+                "max ms": [s["max"] * 1000 for s in spans],
+            }), hide_index=True)
+        if counters:
+            st.dataframe(pd.DataFrame({
+                "counter": [c["name"] for c in counters],
+                "labels": [", ".join(f"{k}={v}" for k, v in c["labels"].items()) for c in counters],
+                "value": [c["value"] for c in counters],
+            }), hide_index=True)
+        for label, frame in (boards or {}).items():
+            st.markdown(f"**Memory: {label}**")
+            st.dataframe(memory_report(frame))
+        st.download_button("Prometheus", metrics.to_prometheus(), file_name="metrics.prom")
+        st.download_button("JSON lines", metrics.to_json_lines(), file_name="metrics.jsonl")
+        st.button("Reset", on_click=metrics.reset)
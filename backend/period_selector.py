@@ -0,0 +1,59 @@
+import datetime
+import streamlit as st
+from backend.analytics.periods import (
+    MONTHS, QUARTERS, month_period, quarter_period, range_period, trailing_period, year_period,
+)
+
+PERIOD_TYPES = ["Year / Month", "Quarter", "Trailing Days", "Custom Range"]
+COMPARISONS = ["Previous Period", "Same Period Last Year"]
+
+# Period inputs shared by the dashboards. Returns the selected Period; the
+# dates it covers are limited to the years given.
+def select_period(years):
+    period_type = st.selectbox("📆 Period", PERIOD_TYPES)
+    col1, col2 = st.columns(2)
+    if period_type == "Year / Month":
+        with col1:
+            year_selected = st.radio("📅 Select the Year", years)
+        with col2:
+            month_selected = st.selectbox("📅 Select the Month", ["Whole Year"] + MONTHS)
+        if month_selected == "Whole Year":
+            return year_period(year_selected)
+        return month_period(year_selected, MONTHS.index(month_selected) + 1)
+
+    if period_type == "Quarter":
+        with col1:
+            year_selected = st.radio("📅 Select the Year", years)
+        with col2:
+            quarter_selected = st.selectbox("📅 Select the Quarter", QUARTERS)
+        return quarter_period(year_selected, QUARTERS.index(quarter_selected) + 1)
+
+    today = datetime.date.today()
+    if period_type == "Trailing Days":
+        with col1:
+            # Trailing windows stay within the selectable years
+            max_days = (today - datetime.date(min(years), 1, 1)).days + 1
+            days = st.number_input("📅 Number of Days", min_value=1, max_value=max_days, value=min(30, max_days), step=1)
+        return trailing_period(int(days), today)
+
+    first, last = datetime.date(min(years), 1, 1), datetime.date(max(years), 12, 31)
+    with col1:
+        selected = st.date_input(
+            "📅 Select the Dates",
+            value=(max(first, today.replace(day=1)), min(last, today)),
+            min_value=first,
+            max_value=last,
+        )
+    # The input returns a single date while the range is being picked
+    if not isinstance(selected, (tuple, list)):
+        selected = (selected, selected)
+    elif len(selected) == 1:
+        selected = (selected[0], selected[0])
+    return range_period(*selected)
+
+# The period the selection is compared with
+def select_comparison(period):
+    comparison = st.radio("🔁 Compare With", COMPARISONS, horizontal=True)
+    if comparison == "Same Period Last Year":
+        return period.year_over_year()
+    return period.previous()
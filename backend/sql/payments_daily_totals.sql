@@ -0,0 +1,19 @@
+-- Payment totals per day and category for start_date <= payment_date < end_date.
+-- Exposed through PostgREST as rpc/payments_daily_totals; every dashboard metric
+-- except the largest payments is derived from this result.
+create or replace function payments_daily_totals(start_date date, end_date date)
+returns table (
+    payment_date date,
+    payment_category text,
+    payment_value numeric,
+    payments bigint
+)
+language sql
+stable
+as $$
+    select p.payment_date::date, p.payment_category, sum(p.payment_value), count(*)
+    from payments p
+    where p.payment_date >= start_date and p.payment_date < end_date
+    group by 1, 2
+    order by 1, 2
+$$;
@@ -0,0 +1,4 @@
+-- Content hash used by upload_payments to make CSV uploads idempotent.
+-- Rows inserted before this migration keep a NULL hash.
+alter table payments add column if not exists row_hash text;
+create unique index if not exists payments_row_hash_key on payments (row_hash);
@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from backend.api.board_frames import BoardFrameBuilder, concat_boards
+from backend.api.monday import boards, iter_board_items, get_board_columns, resolve_column_ids, board_schema_from_types
+
+# Local snapshot of every synced board, keyed by board and item id
+SNAPSHOT_PATH = os.getenv("MONDAY_SNAPSHOT_PATH", os.path.join("data", "monday_snapshot.sqlite"))
+
+# Incremental syncs go back this far to cover clock skew between us and Monday
+SYNC_OVERLAP = datetime.timedelta(days=1)
+
+# Incremental syncs cannot see deleted or moved items, so a board is downloaded
+# in full again once its last full sync is older than this
+FULL_SYNC_INTERVAL = datetime.timedelta(hours=float(os.getenv("MONDAY_FULL_SYNC_HOURS", 6)))
+
+_write_lock = threading.Lock()
+
+def _connect(path=None):
+    path = path or SNAPSHOT_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS items (
+            board_id INTEGER NOT NULL,
+            id TEXT NOT NULL,
+            name TEXT,
+            updated_at TEXT,
+            column_values TEXT NOT NULL,
+            PRIMARY KEY (board_id, id)
+        );
+        CREATE TABLE IF NOT EXISTS sync_state (
+            board_id INTEGER PRIMARY KEY,
+            last_sync TEXT NOT NULL,
+            columns TEXT,
+            last_full_sync TEXT,
+            column_types TEXT
+        );
+    ''')
+    return conn
+
+def _item_row(board_id, item):
+    values = {cv['column']['title']: cv.get('text', None) for cv in item['column_values']}
+    return (board_id, item['id'], item['name'], item.get('updated_at'), json.dumps(values))
+
+# Bring the local snapshot of a board up to date. The first sync (or full=True)
+# downloads every item, later ones only fetch items updated since the last sync.
+# Every FULL_SYNC_INTERVAL the board is downloaded in full again, which drops
+# items deleted or moved on Monday.
+# `columns` limits the snapshot to those column titles; changing it forces a full sync.
+# Returns the number of items written.
+def sync_board(board_name, full=False, path=None, columns=None):
+    board_id = boards[board_name]
+    board_columns = get_board_columns(board_id)
+    column_ids = resolve_column_ids(board_id, columns) if columns is not None else None
+    projection = json.dumps(sorted(columns)) if columns is not None else None
+    column_types = json.dumps({title: column['type'] for title, column in board_columns.items()})
+    started = datetime.datetime.now(datetime.timezone.utc)
+    conn = _connect(path)
+    try:
+        row = conn.execute(
+            "SELECT last_sync, columns, last_full_sync FROM sync_state WHERE board_id = ?", (board_id,)
+        ).fetchone()
+        updated_since = None
+        last_full_sync = row[2] if row else None
+        if row and not full and row[1] == projection and last_full_sync \
+                and started - datetime.datetime.fromisoformat(last_full_sync) < FULL_SYNC_INTERVAL:
+            last_sync = datetime.datetime.fromisoformat(row[0])
+            updated_since = (last_sync - SYNC_OVERLAP).date().isoformat()
+
+        # Download first so a failed sync leaves the previous snapshot untouched
+        rows = []
+        for items in iter_board_items(board_id, updated_since=updated_since, column_ids=column_ids):
+            rows.extend(_item_row(board_id, item) for item in items)
+
+        with _write_lock, conn:
+            if updated_since is None:
+                conn.execute("DELETE FROM items WHERE board_id = ?", (board_id,))
+                last_full_sync = started.isoformat()
+            conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (board_id, last_sync, columns, last_full_sync, column_types) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (board_id, started.isoformat(), projection, last_full_sync, column_types),
+            )
+        return len(rows)
+    finally:
+        conn.close()
+
+# Column types stored with a board's snapshot, or None when the board has not been
+# synced with this projection (or by a version that did not store them)
+def _stored_column_types(conn, board_id, columns):
+    projection = json.dumps(sorted(columns)) if columns is not None else None
+    row = conn.execute(
+        "SELECT columns, column_types FROM sync_state WHERE board_id = ?", (board_id,)
+    ).fetchone()
+    if row is None or row[0] != projection or row[1] is None:
+        return None
+    return json.loads(row[1])
+
+# Read a board's snapshot into a typed DataFrame shaped like fetch_board_data's output.
+# Column types come from the snapshot, so no Monday request is made.
+def load_board(board_name, path=None, columns=None, chunk_size=5000):
+    board_id = boards[board_name]
+    conn = _connect(path)
+    try:
+        column_types = _stored_column_types(conn, board_id, columns)
+        if column_types is None:
+            raise ValueError(f"No snapshot of board {board_name} with columns {columns}")
+        builder = BoardFrameBuilder(board_schema_from_types(board_id, column_types), columns)
+        cursor = conn.execute(
+            "SELECT id, name, column_values FROM items WHERE board_id = ? ORDER BY rowid",
+            (board_id,),
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            values_by_title = {}
+            for i, (_, _, values) in enumerate(rows):
+                for title, text in json.loads(values).items():
+                    column = values_by_title.get(title)
+                    if column is None:
+                        column = values_by_title[title] = [None] * len(rows)
+                    column[i] = text
+            builder.add_columns([row[0] for row in rows], [row[1] for row in rows], values_by_title)
+    finally:
+        conn.close()
+    return builder.build()
+
+# Combined snapshot of several boards as last synced, without contacting Monday.
+# Returns None unless every board has a snapshot with these columns.
+def load_boards(names, path=None, columns=None):
+    conn = _connect(path)
+    try:
+        if any(_stored_column_types(conn, boards[name], columns) is None for name in names):
+            return None
+    finally:
+        conn.close()
+    return concat_boards({name: load_board(name, path=path, columns=columns) for name in names})
+
+# Sync several boards in parallel and return their combined snapshot
+def sync_boards(names=None, full=False, path=None, max_workers=None, columns=None):
+    names = list(boards) if names is None else list(names)
+    unknown = [name for name in names if name not in boards]
+    if unknown:
+        raise ValueError(f"Unknown boards: {unknown}")
+    if not names:
+        return concat_boards({})
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(names)) as executor:
+        list(executor.map(lambda name: sync_board(name, full=full, path=path, columns=columns), names))
+
+    return concat_boards({name: load_board(name, path=path, columns=columns) for name in names})
@@ -0,0 +1,60 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+# Synthetic data shaped like the real Monday boards and Supabase payments table
+
+BASE_DATE = datetime.date(2023, 1, 1)
+DAYS = 1095  # three years of dates
+STATUSES = ["Paid", "Pending", "Refunded", "Overdue"]
+CATEGORIES = ["Employee", "Profit Withdraw", "Softwares", "Operating Costs", "Inbound Development", "Marketing", "Taxes", "Outbound Development", "Other"]
+AGENTS = ["Joao Santos", "Rafael Garcia", "Lucas Lobo"]
+
+# Columns of a synthetic board: (id, title, type)
+BOARD_COLUMNS = [
+    ("date4", "Pmt Date", "date"),
+    ("numbers", "Total Amount", "numbers"),
+    ("status", "Status", "status"),
+    ("text", "Client", "text"),
+    ("long_text", "Notes", "long_text"),
+    ("email", "Email", "email"),
+]
+
+def board_item(board_id, i):
+    # Item i of a board, generated on demand so huge boards need no memory
+    day = BASE_DATE + datetime.timedelta(days=(i * 7919) % DAYS)
+    texts = {
+        "date4": day.isoformat(),
+        "numbers": f"{(i * 37) % 5000 + 0.5}",
+        "status": STATUSES[i % len(STATUSES)],
+        "text": f"Client {i % 997}",
+        "long_text": f"Follow-up notes for item {i} on board {board_id}. " * 3,
+        "email": f"client{i % 997}@example.com",
+    }
+    return {
+        "id": str(board_id % 100000 * 10000000 + i),
+        "name": f"Item {i}",
+        "updated_at": f"{day.isoformat()}T12:00:00Z",
+        "column_values": texts,
+    }
+
+def payments_table(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(BASE_DATE) + pd.to_timedelta(rng.integers(0, DAYS, rows), unit="D")
+    return pd.DataFrame({
+        "id": np.arange(1, rows + 1, dtype="int64"),
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "payment_value": rng.integers(100, 500000, rows) / 100,
+        "payment_category": np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        "payment_date": dates.strftime("%Y-%m-%d").to_numpy(dtype=object),
+        "payment_agent": np.array(AGENTS, dtype=object)[rng.integers(0, len(AGENTS), rows)],
+        "payment_description": "Synthetic payment",
+        "row_hash": None,
+    })
+
+# A CSV-like upload frame as the Accounting page receives it
+def upload_frame(rows, seed=1):
+    table = payments_table(rows, seed=seed)
+    return table[["payment_value", "payment_category", "payment_date", "payment_agent"]].assign(
+        payment_description=[f"Upload row {i}" for i in range(rows)]
+    )
@@ -0,0 +1,195 @@
+import json
+import multiprocessing
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from benchmarks.data import BOARD_COLUMNS, board_item, payments_table
+
+# Local stand-ins for the Monday GraphQL API and Supabase's PostgREST, good enough
+# for the queries this app sends. Monday items are generated on demand; the update
+# filter in query_params is ignored and every item is returned.
+
+MAX_ROWS = 1000  # PostgREST's per-response cap on Supabase
+SCAN_BLOCK = 50000
+
+_board_pattern = re.compile(r"boards\(ids: (\d+)\)")
+_limit_pattern = re.compile(r"items_page\(limit: (\d+)")
+_cursor_pattern = re.compile(r'cursor: "([^"]+)"')
+_ids_pattern = re.compile(r"column_values\(ids: \[([^\]]*)\]\)")
+
+def _monday_response(query, board_sizes):
+    board_id = int(_board_pattern.search(query).group(1))
+    complexity = {"query": 1000, "after": 9000000, "reset_in_x_seconds": 60}
+    if "columns { id title type }" in query:
+        columns = [{"id": cid, "title": title, "type": kind} for cid, title, kind in BOARD_COLUMNS]
+        return {"data": {"complexity": complexity, "boards": [{"columns": columns}]}}
+
+    limit = int(_limit_pattern.search(query).group(1))
+    cursor = _cursor_pattern.search(query)
+    offset = int(cursor.group(1)) if cursor else 0
+    ids = _ids_pattern.search(query)
+    wanted = [cid.strip().strip('"') for cid in ids.group(1).split(",")] if ids else None
+    titles = {cid: title for cid, title, _ in BOARD_COLUMNS}
+
+    size = board_sizes.get(board_id, 0)
+    items = []
+    for i in range(offset, min(offset + limit, size)):
+        item = board_item(board_id, i)
+        item["column_values"] = [
+            {"id": cid, "column": {"title": titles[cid]}, "text": text}
+            for cid, text in item["column_values"].items()
+            if wanted is None or cid in wanted
+        ]
+        items.append(item)
+    next_offset = offset + len(items)
+    page = {"cursor": str(next_offset) if next_offset < size else None, "items": items}
+    return {"data": {"complexity": complexity, "boards": [{"items_page": page}]}}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        # postgrest-py sends an empty JSON body with GETs; drain it to keep the connection usable
+        self._body()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/rest/v1/payments":
+            return self._send(200, self.server.store.select(urllib.parse.parse_qsl(url.query)))
+        self._send(404, {"message": "not found"})
+
+    def do_POST(self):
+        # Read the body before any response, so an early error leaves the connection usable
+        body = self._body()
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/v2":
+            return self._send(200, _monday_response(body["query"], self.server.board_sizes))
+        if url.path == "/rest/v1/payments":
+            prefer = self.headers.get("Prefer", "")
+            ignore = "resolution=ignore-duplicates" in prefer
+            rows = self.server.store.insert(body, params.get("on_conflict") if ignore else None)
+            return self._send(201, rows)
+        if url.path == "/rest/v1/rpc/payments_daily_totals":
+            if not self.server.rpc:
+                return self._send(404, {"code": "PGRST202", "message": "Could not find the function"})
+            return self._send(200, self.server.store.daily_totals(body["start_date"], body["end_date"], params))
+        self._send(404, {"message": "not found"})
+
+class PaymentsStore:
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.hashes = set(table["row_hash"].dropna())
+        self.lock = threading.Lock()
+
+    def select(self, params):
+        filters = []
+        order, limit, offset, columns = None, MAX_ROWS, 0, None
+        for key, value in params:
+            if key == "select":
+                columns = None if value == "*" else [c.strip() for c in value.split(",")]
+            elif key == "order":
+                order = value
+            elif key == "limit":
+                limit = min(int(value), MAX_ROWS)
+            elif key == "offset":
+                offset = int(value)
+            else:
+                op, _, operand = value.partition(".")
+                filters.append((key, op, int(operand) if key == "id" else operand))
+
+        with self.lock:
+            table = self.table
+        # Rows are stored in id order, so id bounds and keyset pages are slices
+        start = 0
+        for key, op, operand in filters:
+            if key == "id" and op in ("gt", "gte"):
+                start = max(start, int(table["id"].searchsorted(operand, side="right" if op == "gt" else "left")))
+        filters = [f for f in filters if not (f[0] == "id" and f[1] in ("gt", "gte"))]
+
+        def matching(block):
+            mask = pd.Series(True, index=block.index)
+            for key, op, operand in filters:
+                column = block[key]
+                if op == "not" and operand == "is.null":
+                    mask &= column.notna()
+                    continue
+                mask &= {"eq": column == operand, "gt": column > operand, "gte": column >= operand,
+                         "lt": column < operand, "lte": column <= operand}[op]
+            return block[mask]
+
+        if order in (None, "id", "id.asc"):
+            parts, found = [], 0
+            for i in range(start, len(table), SCAN_BLOCK):
+                part = matching(table.iloc[i:i + SCAN_BLOCK])
+                parts.append(part)
+                found += len(part)
+                if found >= offset + limit:
+                    break
+            result = pd.concat(parts) if parts else table.iloc[0:0]
+        else:
+            column, _, direction = order.partition(".")
+            result = matching(table.iloc[start:])
+            result = result.nlargest(offset + limit, column) if direction == "desc" else result.nsmallest(offset + limit, column)
+        result = result.iloc[offset:offset + limit]
+        if columns:
+            result = result[columns]
+        return json.loads(result.to_json(orient="records"))
+
+    def insert(self, rows, on_conflict):
+        rows = rows if isinstance(rows, list) else [rows]
+        with self.lock:
+            if on_conflict == "row_hash":
+                rows = [row for row in rows if row.get("row_hash") not in self.hashes]
+            first_id = int(self.table["id"].iloc[-1]) + 1 if len(self.table) else 1
+            new = pd.DataFrame(rows, columns=self.table.columns)
+            new["id"] = range(first_id, first_id + len(new))
+            new["created_at"] = "2025-01-01T00:00:00+00:00"
+            self.table = pd.concat([self.table, new], ignore_index=True)
+            self.hashes.update(row.get("row_hash") for row in rows if row.get("row_hash"))
+        return json.loads(new.to_json(orient="records"))
+
+    def daily_totals(self, start_date, end_date, params):
+        with self.lock:
+            table = self.table
+        rows = table[(table["payment_date"] >= start_date) & (table["payment_date"] < end_date)]
+        totals = rows.groupby(["payment_date", "payment_category"]).agg(
+            payment_value=("payment_value", "sum"), payments=("id", "size")
+        ).reset_index()
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", MAX_ROWS)), MAX_ROWS)
+        return json.loads(totals.iloc[offset:offset + limit].to_json(orient="records"))
+
+def _serve(board_sizes, payment_rows, rpc, ready):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.board_sizes = board_sizes
+    server.rpc = rpc
+    server.store = PaymentsStore(payments_table(payment_rows))
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+# Start both stand-ins in a child process, so their memory and CPU use stay out of
+# the measurements. Returns (process, base_url); Monday is served at base_url + "/v2"
+# and PostgREST at base_url + "/rest/v1".
+def start_servers(board_sizes, payment_rows, rpc=True):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(board_sizes, payment_rows, rpc, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=120)
+    return process, f"http://127.0.0.1:{port}"
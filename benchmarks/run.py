@@ -0,0 +1,174 @@
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from supabase import create_client
+from backend.api import monday
+from backend.api.board_frames import memory_report
+from backend.api.payments import daily_totals, fetch_daily_totals, fetch_payments, import_payments_csv
+from backend.analytics.cube import FinanceCube
+from backend.analytics.periods import month_period, quarter_period, year_period
+from benchmarks.data import upload_frame
+from benchmarks.fake_servers import start_servers
+
+# Benchmark the data paths behind the dashboards against local stand-ins.
+#
+#   python -m benchmarks.run --sizes 1000 10000 100000
+#   python -m benchmarks.run --sizes 1000000 --repeat 1 --compare benchmarks/results/<previous>.json
+#
+# Every stage is timed --repeat times and run once more under tracemalloc for its
+# peak memory. Results are written as JSON to benchmarks/results/.
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+MONTHS = ["Whole Year"] + [datetime.date(2000, m, 1).strftime("%B") for m in range(1, 13)]
+YEARS = [2024, 2025]
+
+def _periods():
+    # Every selection the Finance page offers, with the period before it
+    for year in YEARS:
+        for month_index in range(len(MONTHS)):
+            if month_index == 0:
+                start = pd.Timestamp(year=year, month=1, day=1)
+                yield start, start + pd.offsets.YearBegin(1), start - pd.offsets.YearBegin(1)
+            else:
+                start = pd.Timestamp(year=year, month=month_index, day=1)
+                yield start, start + pd.offsets.MonthBegin(1), start - pd.offsets.MonthBegin(1)
+
+def _measure(stage, rows, repeat, run, setup=None):
+    latencies = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        gc.collect()
+        started = time.perf_counter()
+        run(*args)
+        latencies.append(time.perf_counter() - started)
+
+    args = setup() if setup else ()
+    gc.collect()
+    tracemalloc.start()
+    run(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies)
+    p50 = float(np.percentile(latencies, 50))
+    result = {
+        "stage": stage,
+        "rows": rows,
+        "repeat": repeat,
+        "latency_ms": {
+            "p50": p50 * 1000,
+            "p95": float(np.percentile(latencies, 95)) * 1000,
+            "p99": float(np.percentile(latencies, 99)) * 1000,
+            "min": float(latencies.min()) * 1000,
+            "max": float(latencies.max()) * 1000,
+        },
+        "rows_per_second": rows / p50 if p50 > 0 else None,
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+    print(f"{stage:<28} {rows:>9} rows  p50 {result['latency_ms']['p50']:>10.1f} ms  "
+          f"{result['rows_per_second'] or 0:>12.0f} rows/s  peak {result['peak_memory_mb']:>8.1f} MB")
+    return result
+
+def run_size(size, repeat, upload_rows, rpc):
+    board_sizes = {monday.boards[name]: size // len(monday.sales_boards) for name in monday.sales_boards}
+    board_sizes[monday.boards["educational"]] = size
+    process, base_url = start_servers(board_sizes, size, rpc=rpc)
+    try:
+        monday.scheduler.url = base_url + "/v2"
+        client = create_client(base_url, "bench.bench.bench")
+
+        def cold():
+            monday._board_columns.clear()
+            return ()
+
+        results = [
+            _measure("fetch_board_data", size, repeat,
+                     lambda: monday.fetch_board_data(monday.boards["educational"]), cold),
+            _measure("fetch_board_data_projected", size, repeat,
+                     lambda: monday.fetch_board_data(monday.boards["educational"], columns=monday.sales_columns), cold),
+            _measure("df_sales_concat", sum(board_sizes[monday.boards[n]] for n in monday.sales_boards), repeat,
+                     lambda: monday.fetch_boards(monday.sales_boards, columns=monday.sales_columns), cold),
+        ]
+
+        df_sales = monday.fetch_boards(monday.sales_boards, columns=monday.sales_columns)
+        # Memory held per board once every column is loaded
+        print(memory_report(monday.fetch_boards(monday.sales_boards)).to_string())
+        start, end = f"{min(YEARS) - 1}-01-01", f"{max(YEARS) + 1}-01-01"
+        results.append(_measure("payments_keyset_read", size, repeat,
+                                lambda: fetch_payments(client, "payments", start, end)))
+        results.append(_measure("payments_daily_totals", size, repeat,
+                                lambda: fetch_daily_totals(client, "payments", start, end)))
+
+        payments = fetch_payments(client, "payments", start, end)
+        totals = daily_totals(payments)
+        results.append(_measure("finance_cube_build", len(df_sales) + len(payments), repeat,
+                                lambda: FinanceCube(df_sales, totals)))
+
+        cube = FinanceCube(df_sales, totals)
+        today = pd.Timestamp(datetime.date.today())
+
+        def lookups():
+            for period_start, period_end, previous_start in _periods():
+                cube.period(period_start, period_end, until=today)
+                cube.period(previous_start, period_start, until=today)
+        results.append(_measure("finance_period_lookups", len(df_sales) + len(payments), repeat, lookups))
+
+        # Every year, quarter and month with the period before it and the same period last year
+        selections = [year_period(y) for y in YEARS] \
+            + [quarter_period(y, q) for y in YEARS for q in range(1, 5)] \
+            + [month_period(y, m) for y in YEARS for m in range(1, 13)]
+        periods = selections + [p.previous() for p in selections] + [p.year_over_year() for p in selections]
+        results.append(_measure("finance_period_compare", len(periods), repeat,
+                                lambda: cube.compare(periods, until=today)))
+
+        seeds = iter(range(10, 10 + repeat + 1))
+        rows = min(size, upload_rows)
+        results.append(_measure("save_to_supabase", rows, repeat,
+                                lambda csv: import_payments_csv(client, "payments", io.BytesIO(csv)),
+                                lambda: (upload_frame(rows, seed=next(seeds)).to_csv(index=False).encode(),)))
+        return results
+    finally:
+        process.terminate()
+        process.join()
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = {(r["stage"], r["rows"]): r for r in json.load(f)["results"]}
+    print(f"\nChange in p50 latency against {previous_path}")
+    for result in results:
+        before = previous.get((result["stage"], result["rows"]))
+        if before:
+            ratio = result["latency_ms"]["p50"] / before["latency_ms"]["p50"]
+            print(f"{result['stage']:<28} {result['rows']:>9} rows  {(ratio - 1) * 100:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Finance and Accounting data paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--upload-rows", type=int, default=20000, help="cap on rows uploaded per run")
+    parser.add_argument("--no-rpc", action="store_true", help="serve no payments_daily_totals function")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.repeat, args.upload_rows, rpc=not args.no_rpc))
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"created_at": datetime.datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,55 @@
 import streamlit as st
 import pandas as pd
 from supabase import create_client, Client
+from backend.api.payments import get_payments_cache, import_payments_csv, payments_summary, record_response, PAYMENTS_CACHE_TTL
+from backend.cache import shared_cache
+from backend.analytics.cube import record_payments
+from backend.analytics.periods import selectable_years
+from backend.period_selector import select_period
+from backend import metrics
+from backend.metrics_panel import render_metrics_sidebar
 from dotenv import load_dotenv
 import os
+import time
 
 # Load environment variables
 load_dotenv()
 SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
-SUPABASE_BASE_URL = "https://bnwuaviahfwgqpakswwj.supabase.co"
+SUPABASE_BASE_URL = os.getenv("SUPABASE_URL", "https://bnwuaviahfwgqpakswwj.supabase.co")
 TABLE_NAME = "payments"
 
 # Initialize Supabase client
 supabase: Client = create_client(SUPABASE_BASE_URL, SUPABASE_API_KEY)
 
-# Function to save data to Supabase
-def save_to_supabase(df, supabase_client, table_name):
-    df["payment_date"] = pd.to_datetime(df["payment_date"]).dt.strftime('%Y-%m-%d')
-    rows = df.to_dict(orient="records")
-    errors = []
-    for row in rows:
-        response = supabase_client.table(table_name).insert(row).execute()
-        if response is None:
-            errors.append(row)
-
-    if errors:
-        st.error(f"Failed to upload {len(errors)} rows. Check the data and try again.")
-        st.write(response)
+# Function to save data to Supabase, streaming the CSV in chunks
+def save_to_supabase(csv_file, supabase_client, table_name):
+    total_size = getattr(csv_file, "size", None)
+    progress = st.progress(0.0, text="Uploading...")
+
+    def on_progress(rows_read, result):
+        fraction = min(csv_file.tell() / total_size, 1.0) if total_size else 0.0
+        progress.progress(fraction, text=f"Read {rows_read:,} rows: {result['uploaded']:,} uploaded, {result['skipped']:,} already present")
+
+    try:
+        result = import_payments_csv(supabase_client, table_name, csv_file, on_progress=on_progress)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+    progress.progress(1.0, text="Done")
+
+    invalid = result["invalid"]
+    failed_chunks = result["failed_chunks"]
+    if result["invalid_count"]:
+        st.warning(f"⚠️ Skipped {result['invalid_count']} invalid rows.")
+        st.write(invalid)
+    if failed_chunks:
+        st.error(f"Failed to upload {len(failed_chunks)} chunks. Uploading the same file again only sends the missing rows.")
+        st.table(pd.DataFrame({
+            "CSV rows": [f"{c['rows'][0] + 1}-{c['rows'][1] + 1}" for c in failed_chunks],
+            "Error": [c["error"] for c in failed_chunks],
+        }))
     else:
-        st.success(f"Successfully uploaded {len(rows)} rows to Supabase!")
+        st.success(f"Successfully uploaded {result['uploaded']} rows to Supabase! ({result['skipped']} already present)")
 
 def main():
     st.set_page_config(
@@ -74,38 +96,13 @@ def main():
     st.markdown("<hr>", unsafe_allow_html=True)
 
     if st.session_state["mode"] == "View":
-        months = ["Whole Year", "January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-        years = [2024, 2025]
-
-        col1, col2 = st.columns(2)
-        with col1:
-            year_selected = st.radio("📅 Select the Year", years)
-        with col2:
-            month_selected = st.selectbox("📅 Select the Month", months)
+        period = select_period(selectable_years())
+        start_date, end_date = period.bounds()
 
         st.markdown("## **Filtered Payments Overview**")
         st.markdown("---")
 
         with st.spinner("Fetching data..."):
-            if month_selected == "Whole Year":
-                response = supabase.table(TABLE_NAME).select("*") \
-                    .filter("payment_date", "gte", f"{year_selected}-01-01") \
-                    .filter("payment_date", "lt", f"{year_selected + 1}-01-01") \
-                    .execute()
-            else:
-                month_index = months.index(month_selected)
-                if month_index == 12:
-                    start_date = f"{year_selected}-12-01"
-                    end_date = f"{year_selected + 1}-01-01"
-                else:
-                    start_date = f"{year_selected}-{month_index:02d}-01"
-                    end_date = f"{year_selected}-{month_index + 1:02d}-01"
-
-                response = supabase.table(TABLE_NAME).select("*") \
-                    .filter("payment_date", "gte", start_date) \
-                    .filter("payment_date", "lt", end_date) \
-                    .execute()
-
             # Initialize safe defaults
             total_cost = 0
             max_cost_per_category = pd.Series(dtype='float64')
@@ -115,20 +112,20 @@ def main():
             expenses_over_time = pd.Series(dtype='float64')
             top_payments = pd.DataFrame(columns=["payment_date", "payment_description", "payment_value"])
 
+            # Metrics are grouped in the database, only the small results are transferred
             try:
-                if response and response.data:
-                    df = pd.DataFrame(response.data)
-                    if not df.empty and "payment_date" in df.columns:
-                        df["payment_date"] = pd.to_datetime(df["payment_date"])
-
-                        total_cost = df["payment_value"].sum()
-                        max_cost_per_category = df.groupby('payment_category')["payment_value"].sum()
-                        most_frequent_category = df["payment_category"].mode()[0] if not df["payment_category"].mode().empty else "None"
-                        average_payment = df["payment_value"].mean()
-                        total_payments = df.shape[0]
-
-                        expenses_over_time = df.groupby("payment_date")["payment_value"].sum()
-                        top_payments = df.nlargest(5, "payment_value")
+                summary = shared_cache.get_or_load(
+                    ("payments", "summary", start_date, end_date),
+                    lambda: payments_summary(supabase, TABLE_NAME, start_date, end_date),
+                    ttl=PAYMENTS_CACHE_TTL,
+                )
+                total_cost = summary["total_cost"]
+                max_cost_per_category = summary["by_category"]
+                most_frequent_category = summary["most_frequent_category"]
+                average_payment = summary["average"]
+                total_payments = summary["count"]
+                expenses_over_time = summary["by_date"]
+                top_payments = summary["top_payments"]
             except Exception as e:
                 st.warning(f"⚠️ Data processing skipped due to: {e}")
 
@@ -143,7 +140,7 @@ def main():
 
             st.subheader("💡 Key Metrics")
             col1, col2, col3 = st.columns(3)
-            col1.metric(f"💵 Total Cost ({month_selected} {year_selected})", f"${total_cost:,.2f}")
+            col1.metric(f"💵 Total Cost ({period.label})", f"${total_cost:,.2f}")
             col2.metric("🏷️ Top Cost Category", f"{max_category_name} (${max_category_value:,.2f})")
             col3.metric("📊 Top Cost %", f"{top_cost_percentage:.2f}%")
 
@@ -156,18 +153,19 @@ def main():
 
             st.subheader("📈 **Visual Analytics**")
             col1, col2 = st.columns(2)
-            with col1:
+            with col1, metrics.span("render", chart="expenses_over_time"):
                 st.markdown("**Expenses Over Time**")
                 st.line_chart(expenses_over_time)
 
-            with col2:
+            with col2, metrics.span("render", chart="cost_by_category"):
                 st.markdown("**Cost Distribution by Category**")
                 st.bar_chart(max_cost_per_category)
 
             st.markdown("<hr>", unsafe_allow_html=True)
 
             st.subheader("🏆 Top 5 Highest Payments")
-            st.table(top_payments)
+            with metrics.span("render", chart="top_payments"):
+                st.table(top_payments)
 
     elif st.session_state["mode"] == "Edit":
         st.markdown("## ✏️ **Edit Mode: Add or Upload Payments**")
@@ -191,7 +189,12 @@ def main():
                     "payment_agent": payment_agent,
                     "payment_description": payment_description.strip(),
                 }
-                response = supabase.table(TABLE_NAME).insert(new_payment).execute()
+                sent_at = time.monotonic()
+                with metrics.span("supabase", op="insert"):
+                    response = supabase.table(TABLE_NAME).insert(new_payment).execute()
+                record_response(response.data, "insert")
+                get_payments_cache(supabase, TABLE_NAME).invalidate([new_payment["payment_date"]])
+                record_payments(response.data, sent_at)
                 if response.data is not None:
                     st.toast("✅ Payment submitted successfully!", icon='🎉')
                 else:
@@ -201,23 +204,30 @@ def main():
         uploaded_file = st.file_uploader("Choose a prepared CSV file", type=["csv"])
         if uploaded_file is not None:
             try:
-                df_prepared = pd.read_csv(uploaded_file)
-                st.write("📝 **Preview of Uploaded Data:**", df_prepared.head())
+                # Only the first rows are read for the preview, the upload streams the file
+                st.write("📝 **Preview of Uploaded Data:**", pd.read_csv(uploaded_file, nrows=5))
+                uploaded_file.seek(0)
 
                 if st.button("📤 Upload to Supabase"):
                     with st.spinner("Uploading data to Supabase..."):
-                        save_to_supabase(df_prepared, supabase, TABLE_NAME)
+                        save_to_supabase(uploaded_file, supabase, TABLE_NAME)
             except Exception as e:
                 st.error(f"❌ An error occurred: {e}")
 
         expander = st.expander("Check Last Payment")
-        last_payment = supabase.table(TABLE_NAME) \
-            .select("*") \
-            .order("id", desc=True) \
-            .limit(1) \
-            .execute()
-        
-        data = last_payment.data
+        def fetch_last_payment():
+            with metrics.span("supabase", op="last_payment"):
+                data = supabase.table(TABLE_NAME) \
+                    .select("*") \
+                    .order("id", desc=True) \
+                    .limit(1) \
+                    .execute() \
+                    .data
+            record_response(data, "last_payment")
+            return data
+
+        # Shared by every session until the next insert
+        data = shared_cache.get_or_load(("payments", "last_payment"), fetch_last_payment, ttl=PAYMENTS_CACHE_TTL)
 
         if data: 
             last_row = data[0] 
@@ -242,5 +252,7 @@ def main():
         else:
             expander.write("No data found.")
 
+    render_metrics_sidebar()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import io
+import pandas as pd
+from backend.api.payments import import_payments_csv, payment_hashes, prepare_payments
+
+# Just enough of the Supabase client for import_payments_csv: id-ordered selects
+# and upserts that skip rows whose row_hash is already stored
+class FakeQuery:
+    def __init__(self, table):
+        self.table = table
+        self.after = None
+        self.size = None
+
+    def filter(self, column, op, value):
+        assert (column, op) == ("id", "gt")
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        rows = [row for row in self.table.rows if self.after is None or row["id"] > self.after]
+        return FakeResponse(rows[:self.size])
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+class FakeUpsert:
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows
+
+    def execute(self):
+        stored = {row["row_hash"] for row in self.table.rows}
+        inserted = []
+        for row in self.rows:
+            if row["row_hash"] not in stored:
+                row = dict(row, id=len(self.table.rows) + 1)
+                self.table.rows.append(row)
+                stored.add(row["row_hash"])
+                inserted.append(row)
+        return FakeResponse(inserted)
+
+class FakeTable:
+    def __init__(self):
+        self.rows = []
+
+    def select(self, columns):
+        return FakeQuery(self)
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        return FakeUpsert(self, rows)
+
+class FakeClient:
+    supabase_url = "fake"
+
+    def __init__(self):
+        self.tables = {}
+
+    def table(self, name):
+        return self.tables.setdefault(name, FakeTable())
+
+CSV = """payment_value,payment_category,payment_date,payment_agent,payment_description
+10.00,Softwares,2024-01-05,Lucas Lobo,License
+10.00,Softwares,2024-01-05,Lucas Lobo,License
+25.50,Marketing,2024-02-10,Joao Santos,Ads
+abc,Marketing,2024-02-11,Joao Santos,Ads
+"""
+
+def test_payment_hashes_of_no_rows():
+    prepared, invalid = prepare_payments(pd.DataFrame({
+        "payment_value": ["abc"], "payment_category": ["Taxes"], "payment_date": ["2024-01-01"],
+    }))
+    assert prepared.empty and len(invalid) == 1
+    seen = {}
+    assert payment_hashes(prepared, seen).empty
+    assert seen == {}
+
+def test_import_chunk_without_valid_rows():
+    client = FakeClient()
+    result = import_payments_csv(client, "payments", io.StringIO(CSV), chunk_rows=1)
+    assert result["uploaded"] == 3
+    assert result["invalid_count"] == 1
+    assert not result["failed_chunks"]
+
+def test_reimport_skips_every_row():
+    client = FakeClient()
+    first = import_payments_csv(client, "payments", io.StringIO(CSV), chunk_rows=2)
+    second = import_payments_csv(client, "payments", io.StringIO(CSV), chunk_rows=3)
+    assert first["uploaded"] == 3
+    assert second["uploaded"] == 0
+    assert second["skipped"] == 3
+    assert len(client.table("payments").rows) == 3